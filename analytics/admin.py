@@ -0,0 +1,33 @@
+from django.contrib import admin
+
+from .models import DailyCategorySales, DailyProductSales, DailySales
+
+
+class SalesRollupAdmin(admin.ModelAdmin):
+    list_filter = ["date"]
+    date_hierarchy = "date"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DailySales)
+class DailySalesAdmin(SalesRollupAdmin):
+    list_display = ["date", "order_count", "quantity", "revenue", "paid_revenue"]
+
+
+@admin.register(DailyProductSales)
+class DailyProductSalesAdmin(SalesRollupAdmin):
+    list_display = ["date", "product", "order_count", "quantity",
+                    "revenue", "paid_revenue"]
+    list_select_related = ["product"]
+
+
+@admin.register(DailyCategorySales)
+class DailyCategorySalesAdmin(SalesRollupAdmin):
+    list_display = ["date", "category", "order_count", "quantity",
+                    "revenue", "paid_revenue"]
+    list_select_related = ["category"]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AppliedOrderEvent',
+            fields=[
+                ('event_id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='Событие')),
+                ('applied', models.DateTimeField(db_index=True, verbose_name='Учтено')),
+            ],
+            options={
+                'verbose_name': 'Учтенное событие заказа',
+                'verbose_name_plural': 'Учтенные события заказов',
+            },
+        ),
+    ]
@@ -0,0 +1,87 @@
+from django.db import models
+
+from goods.models import Category, Product
+
+
+class SalesRollup(models.Model):
+    """
+    Продажи за день по всем заказам и по оплаченным (статус после
+    «Ожидает оплаты»). Строки увеличиваются по событиям заказов
+    (analytics.services.apply_order_events), ежедневная сверка
+    пересчитывает дни целиком (rebuild_sales_rollups).
+    """
+    date = models.DateField(verbose_name="Дата")
+    order_count = models.PositiveIntegerField(default=0,
+                                              verbose_name="Заказов")
+    quantity = models.PositiveIntegerField(default=0,
+                                           verbose_name="Продано единиц")
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0,
+                                  verbose_name="Выручка")
+    paid_quantity = models.PositiveIntegerField(default=0,
+                                                verbose_name="Оплачено единиц")
+    paid_revenue = models.DecimalField(max_digits=14, decimal_places=2,
+                                       default=0,
+                                       verbose_name="Оплаченная выручка")
+
+    class Meta:
+        abstract = True
+
+
+class DailySales(SalesRollup):
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["date"],
+                                    name="unique_daily_sales"),
+        ]
+        verbose_name = "Продажи за день"
+        verbose_name_plural = "Продажи по дням"
+
+
+class DailyProductSales(SalesRollup):
+    product = models.ForeignKey(Product,
+                                on_delete=models.CASCADE,
+                                related_name="+",
+                                verbose_name="Товар")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["date", "product"],
+                                    name="unique_daily_product_sales"),
+        ]
+        indexes = [
+            models.Index(fields=["product", "date"]),
+        ]
+        verbose_name = "Продажи товара за день"
+        verbose_name_plural = "Продажи товаров по дням"
+
+
+class DailyCategorySales(SalesRollup):
+    category = models.ForeignKey(Category,
+                                 on_delete=models.CASCADE,
+                                 related_name="+",
+                                 verbose_name="Категория")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["date", "category"],
+                                    name="unique_daily_category_sales"),
+        ]
+        indexes = [
+            models.Index(fields=["category", "date"]),
+        ]
+        verbose_name = "Продажи категории за день"
+        verbose_name_plural = "Продажи категорий по дням"
+
+
+class AppliedOrderEvent(models.Model):
+    """
+    Событие outbox, уже учтенное в сводках: повторная доставка того же
+    события не увеличивает сводки второй раз
+    """
+    event_id = models.BigIntegerField(primary_key=True,
+                                      verbose_name="Событие")
+    applied = models.DateTimeField(db_index=True, verbose_name="Учтено")
+
+    class Meta:
+        verbose_name = "Учтенное событие заказа"
+        verbose_name_plural = "Учтенные события заказов"
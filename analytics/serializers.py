@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework import serializers
+
+
+class SalesReportQuerySerializer(serializers.Serializer):
+    GROUP_BY_CHOICES = ("day", "product", "category")
+
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    group_by = serializers.ChoiceField(choices=GROUP_BY_CHOICES, default="day")
+    category = serializers.IntegerField(required=False, min_value=1)
+    product = serializers.IntegerField(required=False, min_value=1)
+
+    def validate(self, data):
+        data.setdefault("date_to", timezone.localdate())
+        data.setdefault("date_from", data["date_to"] - timedelta(days=29))
+        if data["date_from"] > data["date_to"]:
+            raise serializers.ValidationError(
+                {"date_from": "Начало периода позже его конца"}
+            )
+        if data["group_by"] == "category" and "product" in data:
+            raise serializers.ValidationError(
+                {"product": "Фильтр по товару недоступен при группировке по категориям"}
+            )
+        return data
+
+
+class SalesFiguresSerializer(serializers.Serializer):
+    order_count = serializers.IntegerField()
+    quantity = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+    paid_quantity = serializers.IntegerField()
+    paid_revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class DailySalesSerializer(SalesFiguresSerializer):
+    date = serializers.DateField()
+
+
+class ProductSalesSerializer(SalesFiguresSerializer):
+    product = serializers.IntegerField(source="product_id")
+    product_name = serializers.CharField(source="product__name")
+
+
+class CategorySalesSerializer(SalesFiguresSerializer):
+    category = serializers.IntegerField(source="category_id")
+    category_name = serializers.CharField(source="category__name")
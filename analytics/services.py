@@ -0,0 +1,267 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, DecimalField, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from core.utils import day_start
+from orders.models import ArchivedOrderItem, Order, OrderItem, OutboxEvent
+from .models import (
+    AppliedOrderEvent, DailyCategorySales, DailyProductSales, DailySales
+)
+
+
+FIGURES = ["order_count", "quantity", "revenue", "paid_quantity", "paid_revenue"]
+
+# Модель сводки -> поле группировки в сводке, в позициях заказов
+# и в позициях архивных заказов
+ROLLUPS = (
+    (DailySales, None, None),
+    (DailyProductSales, "product", "product_id"),
+    (DailyCategorySales, "category", "product__category_id"),
+)
+
+# Строк в одном INSERT приращений: держит число параметров в пределах
+# лимитов драйвера
+ROLLUP_INSERT_BATCH_SIZE = 500
+
+
+def _line_revenue():
+    return Sum(F("price") * F("quantity"),
+               output_field=DecimalField(max_digits=14, decimal_places=2))
+
+
+def _created_in_days(field, days):
+    """
+    Условие field попадает в один из дней days: полуоткрытые интервалы
+    по подряд идущим дням вместо field__date, чтобы работали индекс по
+    created и отсечение секций архива
+    """
+    condition = Q()
+    for start, end in _day_runs(days):
+        condition |= Q(**{f"{field}__gte": day_start(start),
+                          f"{field}__lt": day_start(end)})
+    return condition
+
+
+def _day_runs(days):
+    """Сортированные дни -> интервалы [первый день, день после последнего)"""
+    runs = []
+    for day in days:
+        if runs and runs[-1][1] == day:
+            runs[-1][1] = day + timedelta(days=1)
+        else:
+            runs.append([day, day + timedelta(days=1)])
+    return runs
+
+
+# Агрегаты называются sum_*, чтобы не перекрыть поле quantity,
+# на которое ссылается выражение выручки
+
+def _aggregate_order_items(days, group_by):
+    paid = ~Q(order__status=Order.OrderStatus.PENDING)
+    keys = ["date"] + ([group_by] if group_by else [])
+    line_revenue = _line_revenue()
+    return (
+        OrderItem.objects
+        .filter(_created_in_days("order__created", days))
+        .annotate(date=TruncDate("order__created"))
+        .values(*keys)
+        .annotate(sum_order_count=Count("order_id", distinct=True),
+                  sum_quantity=Sum("quantity"),
+                  sum_revenue=line_revenue,
+                  sum_paid_quantity=Sum("quantity", filter=paid),
+                  sum_paid_revenue=Sum(F("price") * F("quantity"), filter=paid,
+                                       output_field=line_revenue.output_field))
+        .order_by()
+    )
+
+
+def _aggregate_archived_items(days, group_by):
+    # В архиве только выполненные заказы — они все оплачены
+    keys = ["date"] + ([group_by] if group_by else [])
+    return (
+        ArchivedOrderItem.objects
+        .filter(_created_in_days("order_created", days))
+        .annotate(date=TruncDate("order_created"))
+        .values(*keys)
+        .annotate(sum_order_count=Count("order_id", distinct=True),
+                  sum_quantity=Sum("quantity"),
+                  sum_revenue=_line_revenue(),
+                  sum_paid_quantity=Sum("quantity"),
+                  sum_paid_revenue=_line_revenue())
+        .order_by()
+    )
+
+
+def _collect_rollup_rows(days, rollup_field, item_field):
+    rows = {}
+    for rows_source in (_aggregate_order_items(days, item_field),
+                        _aggregate_archived_items(days, item_field)):
+        for values in rows_source:
+            key = (values["date"], values[item_field] if item_field else None)
+            row = rows.setdefault(key, dict.fromkeys(FIGURES, 0))
+            for figure in FIGURES:
+                row[figure] += values[f"sum_{figure}"] or 0
+
+    result = []
+    for (date, group_value), figures in rows.items():
+        fields = {"date": date, **figures}
+        if rollup_field:
+            fields[f"{rollup_field}_id"] = group_value
+        result.append(fields)
+    return result
+
+
+def rebuild_sales_rollups(days):
+    """
+    Пересчитывает сводки за дни days по заказам и архиву: по два
+    агрегирующих запроса на сводку. Используется только сверкой и
+    заполнением истории, события заказов применяются apply_order_events.
+    """
+    days = sorted(set(days))
+    if not days:
+        return
+
+    for model, rollup_field, item_field in ROLLUPS:
+        rows = _collect_rollup_rows(days, rollup_field, item_field)
+        unique_fields = ["date"] + ([rollup_field] if rollup_field else [])
+        with transaction.atomic():
+            model.objects.filter(date__in=days).delete()
+            # Upsert на случай параллельного пересчёта того же дня
+            model.objects.bulk_create(
+                [model(**fields) for fields in rows],
+                update_conflicts=True,
+                unique_fields=unique_fields,
+                update_fields=FIGURES,
+            )
+
+
+def apply_order_events(events):
+    """
+    Применяет события заказов к сводкам приращениями, не перечитывая
+    день целиком: оформление добавляет заказ, единицы и выручку, переход
+    в «Оплачен» переносит единицы и выручку заказа в оплаченные. Оплата
+    учитывается только этим переходом, поэтому порядок событий не важен.
+    Событие применяется один раз: его id записывается в той же транзакции.
+    """
+    with transaction.atomic():
+        new_ids = _claim_events([event.id for event in events])
+        created, paid = set(), set()
+        for event in events:
+            if event.id not in new_ids:
+                continue
+            if event.event_type == OutboxEvent.EventType.ORDER_CREATED:
+                created.add(event.payload["order_id"])
+            elif event.payload["status"] == Order.OrderStatus.PAID:
+                paid.update(event.payload["order_ids"])
+
+        if not created and not paid:
+            return
+        lines = list(
+            OrderItem.objects.filter(order_id__in=created | paid)
+            .values("order_id", "order__created", "product_id",
+                    "product__category_id", "price", "quantity")
+        )
+        for model, rollup_field, item_field in ROLLUPS:
+            deltas = _rollup_deltas(lines, created, paid, item_field)
+            _increment_rollup(model, rollup_field, deltas)
+
+
+def _claim_events(event_ids):
+    """
+    Записывает события как учтенные и возвращает id тех, что еще не были
+    учтены. ON CONFLICT DO NOTHING ждет параллельную транзакцию с тем же
+    событием, поэтому одно событие применяет только один воркер.
+    """
+    if not event_ids:
+        return set()
+
+    table = connection.ops.quote_name(AppliedOrderEvent._meta.db_table)
+    applied = AppliedOrderEvent._meta.get_field("applied").get_db_prep_value(
+        timezone.now(), connection
+    )
+    values = ", ".join(["(%s, %s)"] * len(event_ids))
+    params = [value for event_id in event_ids for value in (event_id, applied)]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (event_id, applied) VALUES {values} "
+            f"ON CONFLICT (event_id) DO NOTHING RETURNING event_id",
+            params
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def _rollup_deltas(lines, created, paid, item_field):
+    """Позиции заказов -> {(дата, значение группировки): приращения FIGURES}"""
+    deltas = {}
+    counted_orders = set()
+    for line in lines:
+        key = (timezone.localdate(line["order__created"]),
+               line[item_field] if item_field else None)
+        row = deltas.setdefault(key, dict.fromkeys(FIGURES, 0))
+        revenue = line["price"] * line["quantity"]
+        if line["order_id"] in created:
+            if (key, line["order_id"]) not in counted_orders:
+                counted_orders.add((key, line["order_id"]))
+                row["order_count"] += 1
+            row["quantity"] += line["quantity"]
+            row["revenue"] += revenue
+        if line["order_id"] in paid:
+            row["paid_quantity"] += line["quantity"]
+            row["paid_revenue"] += revenue
+    return deltas
+
+
+def _increment_rollup(model, rollup_field, deltas):
+    """
+    Добавляет приращения к строкам сводки одним
+    INSERT ... ON CONFLICT DO UPDATE SET figure = figure + EXCLUDED.figure
+    на пачку: отсутствующие строки создаются, параллельные приращения
+    не теряются
+    """
+    table = connection.ops.quote_name(model._meta.db_table)
+    key_fields = ["date"] + ([rollup_field] if rollup_field else [])
+    fields = [model._meta.get_field(name) for name in key_fields + FIGURES]
+    columns = ", ".join(field.column for field in fields)
+    conflict = ", ".join(field.column for field in fields[:len(key_fields)])
+    updates = ", ".join(f"{figure} = {table}.{figure} + EXCLUDED.{figure}"
+                        for figure in FIGURES)
+
+    rows = [[date, group_value, *figures.values()] if rollup_field
+            else [date, *figures.values()]
+            for (date, group_value), figures in deltas.items()]
+    for start in range(0, len(rows), ROLLUP_INSERT_BATCH_SIZE):
+        batch = rows[start:start + ROLLUP_INSERT_BATCH_SIZE]
+        values = ", ".join(["(" + ", ".join(["%s"] * len(fields)) + ")"]
+                           * len(batch))
+        params = [field.get_db_prep_value(value, connection)
+                  for row in batch for field, value in zip(fields, row)]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} ({columns}) VALUES {values} "
+                f"ON CONFLICT ({conflict}) DO UPDATE SET {updates}",
+                params
+            )
+
+
+def prune_applied_events(older_than_days=None):
+    """
+    Удаляет отметки об учтенных событиях старше older_than_days дней:
+    к этому времени сами события уже удалены из outbox
+    """
+    if older_than_days is None:
+        older_than_days = settings.OUTBOX_RETENTION_DAYS
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    return AppliedOrderEvent.objects.filter(applied__lt=cutoff).delete()[0]
+
+
+def date_range(date_from, date_to):
+    days = []
+    day = date_from
+    while day <= date_to:
+        days.append(day)
+        day += timedelta(days=1)
+    return days
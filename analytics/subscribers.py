@@ -0,0 +1,9 @@
+from orders.models import OutboxEvent
+from orders.outbox import subscribe
+from .tasks import apply_sales_events
+
+
+@subscribe(OutboxEvent.EventType.ORDER_CREATED)
+@subscribe(OutboxEvent.EventType.ORDER_STATUS_CHANGED)
+def publish_sales_events(events):
+    apply_sales_events.delay([event.id for event in events])
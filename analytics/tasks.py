@@ -0,0 +1,50 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Min
+from django.utils import timezone
+
+from core.celery import app
+from orders.models import ArchivedOrder, Order, OutboxEvent
+from .services import (
+    apply_order_events, date_range, prune_applied_events, rebuild_sales_rollups
+)
+
+
+@app.task
+def apply_sales_events(event_ids):
+    """Применяет к сводкам события заказов event_ids из outbox"""
+    apply_order_events(list(OutboxEvent.objects.filter(id__in=event_ids)))
+
+
+@app.task
+def reconcile_sales_rollups(days=None):
+    """
+    Сверяет сводки за последние days дней с заказами и удаляет старые
+    отметки об учтенных событиях
+    """
+    if days is None:
+        days = settings.SALES_ROLLUP_RECONCILE_DAYS
+
+    today = timezone.localdate()
+    rebuild_sales_rollups(date_range(today - timedelta(days=days - 1), today))
+    prune_applied_events()
+
+
+@app.task
+def backfill_sales_rollups():
+    """Строит сводки за всю историю, включая архив, по месяцу за раз"""
+    first_dates = [
+        value for value in (
+            Order.objects.aggregate(first=Min("created"))["first"],
+            ArchivedOrder.objects.aggregate(first=Min("created"))["first"],
+        ) if value is not None
+    ]
+    if not first_dates:
+        return 0
+
+    days = date_range(timezone.localdate(min(first_dates)), timezone.localdate())
+    chunk = settings.SALES_ROLLUP_BACKFILL_CHUNK_DAYS
+    for start in range(0, len(days), chunk):
+        rebuild_sales_rollups(days[start:start + chunk])
+    return len(days)
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from . import views
+
+
+app_name = "analytics"
+
+urlpatterns = [
+    path("sales/", views.SalesReportAPIView.as_view(), name="sales_report"),
+]
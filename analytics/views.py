@@ -0,0 +1,63 @@
+from django.db.models import Sum
+from rest_framework import generics
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from .models import DailyCategorySales, DailyProductSales, DailySales
+from . import serializers
+
+
+class SalesReportAPIView(generics.GenericAPIView):
+    """
+    Отчёт о продажах для дашборда. Данные берутся только из дневных
+    сводок analytics, таблицы заказов не читаются.
+    """
+    serializer_class = serializers.SalesReportQuerySerializer
+    permission_classes = [IsAdminUser]
+    figures = ["order_count", "quantity", "revenue",
+               "paid_quantity", "paid_revenue"]
+
+    def get(self, request, *args, **kwargs):
+        query = self.get_serializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        rows, serializer_class = self.get_report(params)
+        return Response({
+            "date_from": params["date_from"],
+            "date_to": params["date_to"],
+            "group_by": params["group_by"],
+            "results": serializer_class(rows, many=True).data,
+        })
+
+    def get_report(self, params):
+        group_by = params["group_by"]
+
+        if group_by == "product" or "product" in params:
+            queryset = DailyProductSales.objects.all()
+            category_field = "product__category_id"
+        elif group_by == "category" or "category" in params:
+            queryset = DailyCategorySales.objects.all()
+            category_field = "category_id"
+        else:
+            queryset = DailySales.objects.all()
+
+        queryset = queryset.filter(date__range=(params["date_from"],
+                                                params["date_to"]))
+        if "product" in params:
+            queryset = queryset.filter(product_id=params["product"])
+        if "category" in params:
+            queryset = queryset.filter(**{category_field: params["category"]})
+
+        totals = {figure: Sum(figure) for figure in self.figures}
+        if group_by == "product":
+            rows = (queryset.values("product_id", "product__name")
+                    .annotate(**totals).order_by("-revenue", "product_id"))
+            return rows, serializers.ProductSalesSerializer
+        if group_by == "category":
+            rows = (queryset.values("category_id", "category__name")
+                    .annotate(**totals).order_by("-revenue", "category_id"))
+            return rows, serializers.CategorySalesSerializer
+
+        rows = queryset.values("date").annotate(**totals).order_by("date")
+        return rows, serializers.DailySalesSerializer
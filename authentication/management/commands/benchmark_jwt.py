@@ -0,0 +1,86 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+
+from authentication.services.auth_service import AuthService, clear_token_caches
+
+
+def baseline_decode_access_token(token):
+    """Копия AuthService.decode_access_token до перехода на verify_access_token"""
+    header_b64, payload_b64, signature_b64 = token.split(".")
+    header_payload = f"{header_b64}.{payload_b64}".encode()
+    expected_sig = hmac.new(
+        os.getenv("DJANGO_SECRET_KEY").encode(),
+        header_payload,
+        hashlib.sha256
+    ).digest()
+    expected_sig_b64 = AuthService._base64url_encode(expected_sig)
+
+    payload_json = base64.urlsafe_b64decode(
+        payload_b64 + "=" * (-len(payload_b64) % 4)
+        ).decode()
+
+    payload = json.loads(payload_json)
+
+    return signature_b64, expected_sig_b64, payload
+
+
+def baseline_verify(token):
+    """Прежняя проверка из JWTAuthentication: разбор payload, затем подпись"""
+    sig, expected_sig, payload = baseline_decode_access_token(token)
+    if not hmac.compare_digest(sig, expected_sig):
+        raise ValueError("Неверная сигнатура токена")
+    return payload
+
+
+class Command(BaseCommand):
+    help = "Измеряет скорость проверки access-токенов в одном потоке"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tokens", type=int, default=50_000,
+            help="Сколько разных токенов проверяется в каждом замере",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=5,
+            help="Сколько раз повторяется замер, выводится лучший результат",
+        )
+
+    def handle(self, *args, **options):
+        user = SimpleNamespace(id=1, phone_number="+70000000000",
+                               email="benchmark@example.com")
+        tokens = [AuthService.create_access_token(user)
+                  for _ in range(options["tokens"])]
+        repeated = [tokens[0]] * len(tokens)
+
+        # Прежний код подписывал токены DJANGO_SECRET_KEY, поэтому сравнение
+        # имеет смысл только с ключом подписи по умолчанию
+        try:
+            baseline_verify(tokens[0])
+        except (AttributeError, ValueError):
+            raise CommandError(
+                "Активный ключ JWT_SIGNING_KEYS не совпадает с DJANGO_SECRET_KEY"
+            )
+
+        cases = (
+            ("до, новые токены", baseline_verify, tokens),
+            ("до, повторный токен", baseline_verify, repeated),
+            ("после, новые токены", AuthService.verify_access_token, tokens),
+            ("после, повторный токен", AuthService.verify_access_token, repeated),
+        )
+        for name, verify, case_tokens in cases:
+            best = float("inf")
+            for _ in range(options["repeat"]):
+                # Каждый повтор начинается с пустого LRU проверенных токенов
+                clear_token_caches()
+                started = time.perf_counter()
+                for token in case_tokens:
+                    verify(token)
+                best = min(best, time.perf_counter() - started)
+            self.stdout.write(f"{name}: {len(case_tokens) / best:,.0f} токенов/с")
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0008_delete_revokedaccesstoken'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='refreshtoken',
+            index=models.Index(condition=models.Q(('is_revoked', False)), fields=['user'], name='refresh_token_user_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='refreshtoken',
+            index=models.Index(condition=models.Q(('is_revoked', False)), fields=['expires_at'], name='refresh_token_expires_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='refreshtoken',
+            index=models.Index(condition=models.Q(('is_revoked', True)), fields=['id'], name='refresh_token_revoked_idx'),
+        ),
+    ]
@@ -13,3 +13,18 @@ class RefreshToken(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField()
     is_revoked = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            # Отзыв активных токенов пользователя при выходе и смене пароля
+            models.Index(fields=["user"],
+                         condition=models.Q(is_revoked=False),
+                         name="refresh_token_user_active_idx"),
+            # Поиск истёкших активных токенов для очистки
+            models.Index(fields=["expires_at"],
+                         condition=models.Q(is_revoked=False),
+                         name="refresh_token_expires_idx"),
+            models.Index(fields=["id"],
+                         condition=models.Q(is_revoked=True),
+                         name="refresh_token_revoked_idx"),
+        ]
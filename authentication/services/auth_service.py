@@ -1,16 +1,18 @@
 import base64
+import binascii
+import functools
 import hmac
-import hashlib
-import os
 import json
 import uuid
 from datetime import timedelta
 
+from django.conf import settings
+from django.db.models import Q
 from django.utils import timezone
-from django.utils import timezone
-from rest_framework.exceptions import APIException
+from rest_framework.exceptions import APIException, AuthenticationFailed
 
 from ..models import RefreshToken
+from .keyring import ACCESS_TOKEN_ALG, LEGACY_KID, get_keyring
 
 
 class RefreshTokenExpired(APIException):
@@ -18,6 +20,87 @@ class RefreshTokenExpired(APIException):
     default_detail = "Время жизни токена истекло. Пройдите процедуру авторизации заново."
 
 
+class InvalidAccessToken(AuthenticationFailed):
+    default_detail = "Неверный access-токен"
+
+
+_URLSAFE_ALPHABET = bytes.maketrans(b"-_", b"+/")
+
+
+def _b64decode(data: bytes) -> bytes:
+    data = data.translate(_URLSAFE_ALPHABET) + b"=" * (-len(data) % 4)
+    return binascii.a2b_base64(data, strict_mode=True)
+
+
+_JSON_DECODER = json.JSONDecoder()
+
+
+@functools.lru_cache(maxsize=16)
+def _decode_header(header_b64):
+    # Заголовки у выпущенных токенов одинаковые, разбор кэшируется
+    header = json.loads(_b64decode(header_b64).decode())
+    if not isinstance(header, dict):
+        raise ValueError("header is not an object")
+    return header
+
+
+def _header_key(keyring, header_b64):
+    try:
+        header = _decode_header(header_b64)
+    except (ValueError, binascii.Error):
+        raise InvalidAccessToken({"token": "Неверный формат токена"})
+
+    if header.get("alg") != ACCESS_TOKEN_ALG:
+        raise InvalidAccessToken({"token": "Неподдерживаемый алгоритм подписи"})
+    key = keyring.get(header.get("kid", LEGACY_KID))
+    if key is None:
+        raise InvalidAccessToken({"token": "Неизвестный ключ подписи"})
+    return key
+
+
+@functools.lru_cache(maxsize=4096)
+def _verify_access_token(token):
+    # Исключения не кэшируются, поэтому в LRU попадают только токены
+    # с верной подписью
+    try:
+        signing_input, signature_b64 = token.encode("ascii").rsplit(b".", 1)
+        header_b64, payload_b64 = signing_input.split(b".")
+        signature = _b64decode(signature_b64)
+    except (UnicodeEncodeError, ValueError, binascii.Error):
+        raise InvalidAccessToken({"token": "Неверный формат токена"})
+
+    keyring = get_keyring()
+    # Заголовок токенов активного ключа совпадает с эталонным побайтно,
+    # остальные заголовки разбираются и сверяются по alg и kid
+    if header_b64 == keyring.active_header:
+        key = keyring.active_key
+    else:
+        key = _header_key(keyring, header_b64)
+
+    if not hmac.compare_digest(signature, key.sign(signing_input)):
+        raise InvalidAccessToken({"token": "Неверная сигнатура токена"})
+
+    try:
+        payload_json = _b64decode(payload_b64).decode()
+        # raw_decode без проверки пробелов вокруг значения, которая в
+        # json.loads заметно дороже самого разбора; хвост после объекта
+        # отсекается сравнением длины
+        payload, end = _JSON_DECODER.raw_decode(payload_json)
+    except (ValueError, binascii.Error):
+        raise InvalidAccessToken({"token": "Неверный формат токена"})
+
+    if (end != len(payload_json) or not isinstance(payload, dict)
+            or not isinstance(payload.get("exp"), int)):
+        raise InvalidAccessToken({"token": "Неверный формат токена"})
+    return payload
+
+
+def clear_token_caches():
+    """Сбрасывает кольцо ключей и проверенные токены (ротация, тесты)"""
+    get_keyring.cache_clear()
+    _verify_access_token.cache_clear()
+
+
 class AuthService:
     @staticmethod
     def _base64url_encode(data: bytes) -> str:
@@ -25,33 +108,43 @@ class AuthService:
 
     @staticmethod
     def create_access_token(user):
-        header = {"alg": "HS256", "typ": "AuthService"}
+        keyring = get_keyring()
         payload = {"username": user.phone_number,
                    "email": user.email,
                    "sub": user.id,
                    "jti": str(uuid.uuid4()),
                    "exp": int((timezone.now() + timedelta(minutes=15)).timestamp())}
         
-        header_b64 = AuthService._base64url_encode(json.dumps(header).encode())
+        header_b64 = keyring.active_header_b64
         payload_b64 = AuthService._base64url_encode(json.dumps(payload).encode())
-        signature = hmac.new(
-            os.getenv("DJANGO_SECRET_KEY").encode(),
-            f"{header_b64}.{payload_b64}".encode(),
-            hashlib.sha256
-        ).digest()
+        signature = keyring.active_key.sign(f"{header_b64}.{payload_b64}".encode())
         signature_b64 = AuthService._base64url_encode(signature)
 
         return "{}.{}.{}".format(header_b64, payload_b64, signature_b64)
 
+    @staticmethod
+    def verify_access_token(token):
+        """
+        Проверяет подпись и заголовок access-токена и возвращает payload.
+        Подпись сверяется по байтам до разбора JSON, поэтому на поддельных
+        токенах не тратится время на декодирование payload. Уже проверенные
+        токены берутся из LRU: клиент повторяет один токен до истечения exp.
+        Срок действия и отзыв проверяет вызывающий код.
+        """
+        payload = _verify_access_token(token)
+        # Копия, чтобы изменения payload не попадали в кэш
+        return dict(payload)
+
     @staticmethod
     def decode_access_token(token):
+        """
+        Разбирает токен без проверки: возвращает подпись, ожидаемую подпись
+        и payload. Для аутентификации используется verify_access_token.
+        """
         header_b64, payload_b64, signature_b64 = token.split(".")
-        header_payload = f"{header_b64}.{payload_b64}".encode()
-        expected_sig = hmac.new(
-            os.getenv("DJANGO_SECRET_KEY").encode(),
-            header_payload,
-            hashlib.sha256
-        ).digest()
+        header = _decode_header(header_b64.encode())
+        key = get_keyring().get(header.get("kid", LEGACY_KID))
+        expected_sig = key.sign(f"{header_b64}.{payload_b64}".encode()) if key else b""
         expected_sig_b64 = AuthService._base64url_encode(expected_sig)
 
         payload_json = base64.urlsafe_b64decode(
@@ -89,3 +182,22 @@ class AuthService:
         """Помечает токен как отозванный"""
         token_obj.is_revoked = True
         token_obj.save()
+
+    @staticmethod
+    def delete_stale_refresh_tokens(batch_size=None):
+        """
+        Удаляет отозванные и истёкшие refresh-токены пачками по batch_size,
+        чтобы не держать долгих блокировок. Возвращает число удалённых токенов.
+        """
+        if batch_size is None:
+            batch_size = settings.REFRESH_TOKEN_CLEANUP_BATCH_SIZE
+
+        stale = Q(is_revoked=True) | Q(expires_at__lt=timezone.now())
+        deleted = 0
+        while True:
+            ids = list(RefreshToken.objects.filter(stale)
+                       .values_list("id", flat=True)[:batch_size])
+            if ids:
+                deleted += RefreshToken.objects.filter(id__in=ids).delete()[0]
+            if len(ids) < batch_size:
+                return deleted
@@ -0,0 +1,63 @@
+import base64
+import functools
+import hashlib
+import hmac
+import json
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+
+ACCESS_TOKEN_ALG = "HS256"
+# Токены, выпущенные до появления kid в заголовке
+LEGACY_KID = "default"
+
+
+class HS256Key:
+    """
+    HMAC-SHA256 с подготовленным ключом: объект hmac создается один раз,
+    а для каждого токена только копируется, без повторной обработки ключа
+    """
+    def __init__(self, secret: bytes):
+        self._hmac = hmac.new(secret, digestmod=hashlib.sha256)
+
+    def sign(self, message: bytes) -> bytes:
+        mac = self._hmac.copy()
+        mac.update(message)
+        return mac.digest()
+
+
+class Keyring:
+    """
+    Ключи подписи access-токенов по kid. Новые токены подписываются
+    активным ключом, предыдущие ключи только проверяют уже выданные
+    токены — так ключ меняется без массового перелогина.
+    """
+    def __init__(self, keys, active_kid):
+        if active_kid not in keys:
+            raise ImproperlyConfigured(
+                f"JWT_ACTIVE_KID={active_kid!r} отсутствует в JWT_SIGNING_KEYS"
+            )
+        self.keys = {kid: HS256Key(secret.encode()) for kid, secret in keys.items()}
+        self.active_kid = active_kid
+        # Заголовок у всех новых токенов одинаковый, кодируется один раз
+        header = {"alg": ACCESS_TOKEN_ALG, "typ": "AuthService", "kid": active_kid}
+        self.active_header_b64 = (
+            base64.urlsafe_b64encode(json.dumps(header).encode()).rstrip(b"=").decode()
+        )
+        self.active_header = self.active_header_b64.encode()
+
+    @property
+    def active_key(self):
+        return self.keys[self.active_kid]
+
+    def get(self, kid):
+        if not isinstance(kid, str):
+            return None
+        return self.keys.get(kid)
+
+
+@functools.lru_cache(maxsize=None)
+def get_keyring():
+    """Кольцо ключей собирается из настроек один раз на процесс"""
+    return Keyring(settings.JWT_SIGNING_KEYS, settings.JWT_ACTIVE_KID)
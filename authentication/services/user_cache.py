@@ -0,0 +1,95 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+
+User = get_user_model()
+
+# Поля, которые кэшируются в Redis. Хэш пароля туда не попадает:
+# в собранном из кэша пользователе он отложен и читается из БД по запросу
+CACHED_FIELDS = ("id", "email", "phone_number", "first_name", "last_name",
+                 "is_active", "is_admin", "is_superuser", "last_login",
+                 "date_joined")
+
+
+class UserCache:
+    """
+    Двухуровневый кэш пользователей по id (sub из access-токена):
+    LRU в памяти процесса с коротким TTL перед общим кэшем в Redis.
+    Redis очищается сразу при изменении пользователя (authentication.signals),
+    локальные копии в других процессах живут не дольше USER_CACHE_LOCAL_TTL.
+    """
+    _local = OrderedDict()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _key(user_id):
+        return f"auth:user:fields:{user_id}"
+
+    @staticmethod
+    def get(user_id):
+        user = UserCache._get_local(user_id)
+        if user is None:
+            cache = caches["default"]
+            values = cache.get(UserCache._key(user_id))
+            if values is None:
+                values = (User.objects.filter(pk=user_id)
+                          .values(*CACHED_FIELDS).first())
+                if values is None:
+                    return None
+                cache.set(UserCache._key(user_id), values,
+                          timeout=settings.USER_CACHE_TTL)
+            user = UserCache._build(values)
+            UserCache._set_local(user_id, user)
+        # Копия, чтобы изменения request.user не попадали в кэш
+        return copy.copy(user)
+
+    @staticmethod
+    def _build(values):
+        # from_db помечает остальные поля отложенными, поэтому save()
+        # обновляет только загруженные поля и не затирает пароль.
+        # Значения передаются в порядке полей модели, как их ждет from_db
+        field_names = [field.attname for field in User._meta.concrete_fields
+                       if field.attname in values]
+        return User.from_db(DEFAULT_DB_ALIAS, field_names,
+                            [values[name] for name in field_names])
+
+    @staticmethod
+    def invalidate(user_id):
+        with UserCache._lock:
+            UserCache._local.pop(user_id, None)
+        caches["default"].delete(UserCache._key(user_id))
+
+    @staticmethod
+    def clear_local():
+        with UserCache._lock:
+            UserCache._local.clear()
+
+    @staticmethod
+    def _get_local(user_id):
+        with UserCache._lock:
+            entry = UserCache._local.get(user_id)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if expires_at < time.monotonic():
+                del UserCache._local[user_id]
+                return None
+            UserCache._local.move_to_end(user_id)
+            return user
+
+    @staticmethod
+    def _set_local(user_id, user):
+        with UserCache._lock:
+            UserCache._local[user_id] = (
+                time.monotonic() + settings.USER_CACHE_LOCAL_TTL, user
+            )
+            UserCache._local.move_to_end(user_id)
+            while len(UserCache._local) > settings.USER_CACHE_LOCAL_SIZE:
+                UserCache._local.popitem(last=False)
@@ -0,0 +1,25 @@
+from django.contrib.auth import get_user_model
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .services.auth_service import clear_token_caches
+from .services.user_cache import UserCache
+
+
+User = get_user_model()
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    # Сразу и после фиксации: параллельный запрос мог успеть
+    # положить в кэш ещё не изменённого пользователя
+    UserCache.invalidate(instance.pk)
+    transaction.on_commit(lambda: UserCache.invalidate(instance.pk))
+
+
+@receiver(setting_changed)
+def reload_signing_keys(setting, **kwargs):
+    if setting in ("JWT_SIGNING_KEYS", "JWT_ACTIVE_KID"):
+        clear_token_caches()
@@ -0,0 +1,7 @@
+from core.celery import app
+from .services.auth_service import AuthService
+
+
+@app.task
+def delete_stale_refresh_tokens():
+    return AuthService.delete_stale_refresh_tokens()
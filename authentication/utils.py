@@ -1,10 +1,68 @@
-from django.core.cache import caches
+import threading
+import time
 
+from django.conf import settings
+from django_redis import get_redis_connection
 
-def add_to_blacklist(jti, expires_in):
-    cache = caches["default"]
-    cache.set(jti, "revoked", timeout=expires_in)
+
+REVOKED_KEY = "auth:revoked:jti"
+GENERATION_KEY = "auth:revoked:generation"
+
+
+class RevocationFilter:
+    """
+    Копия черного списка jti в памяти процесса. В Redis отозванные jti
+    лежат в sorted set со временем истечения токена, а счетчик поколения
+    увеличивается при каждом отзыве. Процесс сверяет поколение не чаще
+    раза в JWT_REVOCATION_SYNC_INTERVAL секунд и перечитывает список
+    только если оно изменилось, поэтому обычная проверка не ходит в Redis.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._revoked = set()
+        self._generation = None
+        self._synced_at = None
+
+    def add(self, jti, expires_at):
+        pipe = get_redis_connection("default").pipeline()
+        pipe.zadd(REVOKED_KEY, {jti: expires_at})
+        pipe.zremrangebyscore(REVOKED_KEY, "-inf", time.time())
+        # Начальное значение — текущее время, чтобы после потери ключа
+        # поколения в Redis процессы не приняли новое поколение за старое
+        pipe.set(GENERATION_KEY, time.time_ns(), nx=True)
+        pipe.incr(GENERATION_KEY)
+        pipe.execute()
+
+        with self._lock:
+            self._revoked.add(jti)
+
+    def __contains__(self, jti):
+        synced_at = self._synced_at
+        if (synced_at is None or time.monotonic() - synced_at
+                >= settings.JWT_REVOCATION_SYNC_INTERVAL):
+            self.sync()
+        return jti in self._revoked
+
+    def sync(self):
+        connection = get_redis_connection("default")
+        # Поколение читается до списка: отзыв между двумя запросами
+        # только приведет к лишнему перечитыванию при следующей сверке
+        generation = connection.get(GENERATION_KEY)
+        if generation is None or generation != self._generation:
+            revoked = connection.zrangebyscore(REVOKED_KEY, time.time(), "+inf")
+            with self._lock:
+                self._revoked = {jti.decode() for jti in revoked}
+                self._generation = generation
+        self._synced_at = time.monotonic()
+
+
+revoked_tokens = RevocationFilter()
+
+
+def add_to_blacklist(jti, expires_at):
+    """expires_at — время истечения токена (exp), unix timestamp"""
+    revoked_tokens.add(jti, expires_at)
 
 
 def is_blacklisted(jti):
-    return bool(caches["default"].get(jti))
+    return jti in revoked_tokens
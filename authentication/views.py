@@ -7,6 +7,7 @@ from . import serializers
 from .services.auth_service import RefreshTokenExpired, AuthService
 from .utils import add_to_blacklist
 from .models import RefreshToken
+from cart.services import synchronize_carts
 
 
 class CreateJWTAPIView(APIView):
@@ -14,9 +15,14 @@ class CreateJWTAPIView(APIView):
         serializer = serializers.CreateJWTSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         access_token, refresh_token = serializer.save()
-        return Response({"access_token": access_token,
-                         "refresh_token": refresh_token},
-                         status=status.HTTP_201_CREATED)
+        response = Response({"access_token": access_token,
+                             "refresh_token": refresh_token},
+                            status=status.HTTP_201_CREATED)
+
+        if request.COOKIES.get("cart_id"):
+            synchronize_carts(serializer.validated_data["user"], request.COOKIES)
+            response.delete_cookie("cart_id")
+        return response
 
 
 class RefreshJWTAPIView(APIView):
@@ -40,12 +46,10 @@ class UserLogoutAPIView(APIView):
 
         access_token = auth_header.split()[1]
         _, _, payload = AuthService.decode_access_token(access_token)
-        username = payload.get("username")
-        
+
         add_to_blacklist(payload.get("jti"), payload.get("exp"))
-        
-        RefreshToken.objects.select_related("user")\
-                            .filter(user__phone_number=username, is_revoked=False)\
+
+        RefreshToken.objects.filter(user=request.user, is_revoked=False)\
                             .update(is_revoked=True)
         
         return Response({"detail": "Произведен выход из системы"})
@@ -1,6 +1,3 @@
-from .services import get_or_create_cart
-
-
 class CartMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
@@ -8,18 +5,12 @@ class CartMiddleware:
     def __call__(self, request):
         response = self.get_response(request)
 
-        if request.user.is_authenticated and request.COOKIES.get("cart_id"):
+        # Cookie удаляется только после слияния корзин (MergeGuestCartMixin):
+        # после обновления токена запрос не к корзине не должен терять
+        # гостевую корзину, которую еще не слили
+        if getattr(request, "guest_cart_merged", False):
             response.delete_cookie("cart_id")
         
-        # Если пользователь аноним и нет корзины — создаём и ставим cookie
-        if not request.user.is_authenticated and not request.COOKIES.get("cart_id"):
-            cart = get_or_create_cart(request.user, request.COOKIES)
-            response.set_cookie(
-                key="cart_id",
-                value=str(cart.cart_id),
-                httponly=True,
-                samesite="Lax",
-                max_age=86400
-            )
+        # Гостевая корзина и cookie создаются лениво — при добавлении
+        # первого товара (см. CartItemAPIView.create)
         return response
-    
\ No newline at end of file
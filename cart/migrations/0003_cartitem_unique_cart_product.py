@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:07
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_items(apps, schema_editor):
+    CartItem = apps.get_model("cart", "CartItem")
+    duplicates = (
+        CartItem.objects.values("cart", "product")
+        .annotate(items_count=Count("id"), keep_id=Min("id"),
+                  total_quantity=Sum("quantity"))
+        .filter(items_count__gt=1)
+    )
+    for duplicate in duplicates:
+        CartItem.objects.filter(pk=duplicate["keep_id"]) \
+                        .update(quantity=duplicate["total_quantity"])
+        CartItem.objects.filter(cart=duplicate["cart"],
+                                product=duplicate["product"]) \
+                        .exclude(pk=duplicate["keep_id"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0002_alter_cart_cart_id_alter_cart_user'),
+        ('goods', '0005_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_items, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(fields=('cart', 'product'), name='unique_cart_product'),
+        ),
+    ]
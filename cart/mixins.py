@@ -0,0 +1,15 @@
+from .services import synchronize_carts
+
+
+class MergeGuestCartMixin:
+    """
+    Сливает гостевую корзину с корзиной пользователя при первом
+    обращении к корзине после входа, если слияние не произошло при
+    получении токена. Cookie cart_id удаляет CartMiddleware по флагу
+    guest_cart_merged на исходном HttpRequest.
+    """
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.user.is_authenticated and request.COOKIES.get("cart_id"):
+            synchronize_carts(request.user, request.COOKIES)
+            request._request.guest_cart_merged = True
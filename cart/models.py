@@ -2,6 +2,7 @@ import uuid
 
 from django.conf import settings
 from django.db import models
+from django.db.models import F, Sum
 
 from goods.models import Product
 
@@ -17,15 +18,30 @@ class Cart(models.Model):
 
     @property
     def total_price(self):
-        return sum(
-            item.cost
-            for item in self.items.select_related("product").all()
-        )
+        # Если позиции уже загружены (prefetch_related), считаем по ним
+        if "items" in getattr(self, "_prefetched_objects_cache", {}):
+            return sum(item.cost for item in self.items.all())
+
+        total = self.items.aggregate(
+            total=Sum(F("quantity") * F("product__price"),
+                      output_field=models.DecimalField())
+        )["total"]
+        return total or 0
 
 class CartItem(models.Model):
     cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name="items")
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
+    # Цена, которую покупатель видел при добавлении; сверяется при оформлении
+    price = models.DecimalField(max_digits=10, decimal_places=2,
+                                null=True, blank=True,
+                                verbose_name="Цена при добавлении")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["cart", "product"],
+                                    name="unique_cart_product")
+        ]
 
     @property
     def cost(self):
@@ -3,7 +3,12 @@ from rest_framework import serializers
 from .models import Cart, CartItem
 from goods.serializers import ProductSerializer
 from goods.models import Product
-from .services import add_item_to_cart
+from .services import (
+    add_item_to_cart, get_or_create_cart, add_item_to_guest_cart,
+    uses_redis_storage, get_existing_cart, apply_cart_operations,
+    apply_guest_cart_operations, get_cart_queryset
+)
+from .storage import DetachedCart
 
 
 class CartItemSerializer(serializers.ModelSerializer):
@@ -27,7 +32,12 @@ class CartAddItemSerializer(serializers.Serializer):
         return data
 
     def create(self, validated_data):
-        cart = self.context["request"].cart
+        request = self.context["request"]
+        if uses_redis_storage(request.user):
+            return add_item_to_guest_cart(request.COOKIES,
+                                          validated_data["product"])
+
+        cart = get_or_create_cart(request.user, request.COOKIES)
         cart_item = add_item_to_cart(cart,
                                      validated_data["product"])
         return cart_item
@@ -68,4 +78,51 @@ class CartReduceItemQuantitySerializer(serializers.ModelSerializer):
             instance.quantity = 0
             
         instance.save()
-        return instance
\ No newline at end of file
+        return instance
+
+
+class CartOperationSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=0, max_value=1000)
+    action = serializers.ChoiceField(choices=["set", "add", "remove"],
+                                     default="set")
+
+
+class CartBatchSerializer(serializers.Serializer):
+    operations = CartOperationSerializer(many=True, allow_empty=False,
+                                         max_length=100)
+
+    def validate_operations(self, operations):
+        product_ids = {operation["product_id"] for operation in operations}
+        # Цены читаются тем же запросом и сохраняются в позициях корзины
+        self.product_prices = dict(
+            Product.objects.filter(pk__in=product_ids)
+                           .values_list("pk", "price")
+        )
+        
+        if missing_ids := product_ids - set(self.product_prices):
+            raise serializers.ValidationError(
+                f"Продукты не найдены: {sorted(missing_ids)}"
+            )
+        return operations
+
+    def create(self, validated_data):
+        request = self.context["request"]
+        operations = validated_data["operations"]
+
+        if uses_redis_storage(request.user):
+            return apply_guest_cart_operations(request.COOKIES, operations,
+                                               prices=self.product_prices)
+
+        cart = get_existing_cart(request.user, request.COOKIES)
+        if cart is None:
+            # Не создаём корзину ради одних удалений
+            if all(operation["action"] == "remove" or operation["quantity"] == 0
+                   for operation in operations):
+                return DetachedCart(
+                    user=request.user if request.user.is_authenticated else None
+                )
+            cart = get_or_create_cart(request.user, request.COOKIES)
+
+        apply_cart_operations(cart, operations, prices=self.product_prices)
+        return get_cart_queryset().get(pk=cart.pk)
@@ -1,4 +1,55 @@
+import uuid
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import Prefetch
+
+from goods.models import Product
 from .models import Cart, CartItem
+from .storage import DetachedCart, RedisCartStorage
+
+
+CART_COOKIE_MAX_AGE = 86400
+
+
+def get_cart_queryset():
+    """Корзины вместе с позициями, товарами и категориями (два запроса)"""
+    return Cart.objects.prefetch_related(
+        Prefetch("items",
+                 queryset=CartItem.objects.select_related("product__category")
+                                          .order_by("id"))
+    )
+
+
+def uses_redis_storage(user):
+    """Гостевые корзины хранятся в Redis, если так указано в CART_STORAGE_BACKEND"""
+    return not user.is_authenticated and settings.CART_STORAGE_BACKEND == "redis"
+
+
+def get_existing_cart(user, cookies, queryset=None):
+    """Возвращает корзину, если она уже есть, ничего не создавая"""
+    if queryset is None:
+        queryset = Cart.objects.all()
+
+    if user.is_authenticated:
+        return queryset.filter(user=user).first()
+
+    cart_id = cookies.get("cart_id")
+    if not cart_id:
+        return None
+
+    if uses_redis_storage(user):
+        storage = RedisCartStorage()
+        if not storage.is_valid_cart_id(cart_id):
+            return None
+        cart = storage.load(cart_id)
+        return cart if cart.items else None
+
+    try:
+        return queryset.filter(cart_id=cart_id, user__isnull=True).first()
+    except ValidationError:
+        return None
 
 
 def get_or_create_cart(user, cookies):
@@ -17,48 +68,252 @@ def get_or_create_cart(user, cookies):
     return cart
 
 
-def add_item_to_cart(cart, target_product):
-    cart_item, created = CartItem.objects.get_or_create(cart=cart,
-                                                        product=target_product,
-                                                        defaults={"cart": cart,
-                                                                  "product": target_product}
-                                                        )
-    if not created:
-        cart_item.quantity += 1
-        cart_item.save()
-    
-    return cart_item
+def set_cart_cookie(response, cart_id):
+    response.set_cookie(
+        key="cart_id",
+        value=str(cart_id),
+        httponly=True,
+        samesite="Lax",
+        max_age=CART_COOKIE_MAX_AGE
+    )
 
 
-def synchronize_carts(user, cookies):
-    guest_cart = Cart.objects.get(pk=cookies.get("cart_id"))
-    user_cart = get_or_create_cart(user, cookies)
+def add_item_to_cart(cart, target_product, quantity=1):
+    """
+    Добавляет товар одним запросом INSERT ... ON CONFLICT DO UPDATE:
+    при параллельных запросах ни одно увеличение количества не теряется
+    """
+    table = CartItem._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (cart_id, product_id, quantity, price) "
+            f"VALUES (%s, %s, %s, %s) "
+            f"ON CONFLICT (cart_id, product_id) "
+            f"DO UPDATE SET quantity = {table}.quantity + EXCLUDED.quantity, "
+            f"price = EXCLUDED.price "
+            f"RETURNING id, quantity",
+            [Cart._meta.pk.get_db_prep_value(cart.pk, connection),
+             target_product.pk, quantity, target_product.price]
+        )
+        item_id, new_quantity = cursor.fetchone()
+
+    return CartItem(id=item_id, cart=cart, product=target_product,
+                    quantity=new_quantity, price=target_product.price)
+
+
+def add_item_to_guest_cart(cookies, target_product):
+    storage = RedisCartStorage()
+    cart_id = cookies.get("cart_id")
+    if not cart_id or not storage.is_valid_cart_id(cart_id):
+        cart_id = str(uuid.uuid4())
+
+    quantity = storage.add_item(cart_id, target_product.pk,
+                                price=target_product.price)
+    return CartItem(id=target_product.pk, cart_id=cart_id,
+                    product=target_product, quantity=quantity,
+                    price=target_product.price)
+
+
+def reduce_guest_cart_item(cookies, product_id):
+    """Возвращает обновлённую корзину или None, если товара в ней нет"""
+    storage = RedisCartStorage()
+    cart_id = cookies.get("cart_id")
+    if not cart_id or not storage.is_valid_cart_id(cart_id):
+        return None
+
+    if storage.reduce_item(cart_id, product_id) is None:
+        return None
+    return storage.load(cart_id)
+
+
+def resolve_cart_quantities(current, operations):
+    """
+    Применяет операции set/add/remove к текущим количествам и возвращает
+    итоговое количество для каждого затронутого товара (0 — удалить)
+    """
+    quantities = dict(current)
+    for operation in operations:
+        product_id = operation["product_id"]
+        old_quantity = quantities.get(product_id, 0)
+
+        if operation["action"] == "set":
+            quantities[product_id] = operation["quantity"]
+        elif operation["action"] == "add":
+            quantities[product_id] = old_quantity + operation["quantity"]
+        else:
+            quantities[product_id] = max(old_quantity - operation["quantity"], 0)
+
+    return {operation["product_id"]: quantities[operation["product_id"]]
+            for operation in operations}
+
+
+def apply_cart_operations(cart, operations, prices=None):
+    """
+    prices — {product_id: цена}, уже прочитанные при проверке операций;
+    если переданы, сохраняются в позициях как цена при добавлении
+    """
+    product_ids = {operation["product_id"] for operation in operations}
 
-    user_items = {item.product.pk: item for item in 
-                 CartItem.objects.select_related("product").filter(cart=user_cart)}
-    guest_items = CartItem.objects.select_related("product").filter(cart=guest_cart)
+    with transaction.atomic():
+        # Блокировка строки корзины упорядочивает параллельные пакеты
+        list(Cart.objects.select_for_update().filter(pk=cart.pk)
+                                             .values_list("pk", flat=True))
+        current = dict(
+            CartItem.objects.filter(cart=cart, product_id__in=product_ids)
+                            .values_list("product_id", "quantity")
+        )
+        quantities = resolve_cart_quantities(current, operations)
+
+        removed = [product_id for product_id, quantity in quantities.items()
+                   if quantity <= 0]
+        kept = [CartItem(cart=cart, product_id=product_id, quantity=quantity,
+                         price=prices.get(product_id) if prices else None)
+                for product_id, quantity in quantities.items() if quantity > 0]
+
+        if removed:
+            CartItem.objects.filter(cart=cart, product_id__in=removed).delete()
+        if kept:
+            CartItem.objects.bulk_create(kept,
+                                         update_conflicts=True,
+                                         unique_fields=["cart", "product"],
+                                         update_fields=(["quantity", "price"]
+                                                        if prices else ["quantity"]))
+
+
+def apply_guest_cart_operations(cookies, operations, prices=None):
+    """
+    Возвращает обновлённую гостевую корзину из Redis.
+    prices — как в apply_cart_operations
+    """
+    storage = RedisCartStorage()
+    cart_id = cookies.get("cart_id")
+    if not cart_id or not storage.is_valid_cart_id(cart_id):
+        cart_id = str(uuid.uuid4())
+
+    storage.apply(cart_id,
+                  lambda current: resolve_cart_quantities(current, operations),
+                  prices=prices)
+    return storage.load(cart_id)
+
+
+def materialize_guest_cart(cart_id):
+    """Переносит гостевую корзину из Redis в Cart/CartItem (для оформления заказа)"""
+    storage = RedisCartStorage()
+    if not storage.is_valid_cart_id(cart_id):
+        raise Cart.DoesNotExist()
+
+    quantities, prices = storage.get_entries(cart_id)
+    existing_products = set(
+        Product.objects.filter(pk__in=list(quantities))
+                       .values_list("pk", flat=True)
+    )
+
+    with transaction.atomic():
+        cart, _ = Cart.objects.get_or_create(cart_id=cart_id, user__isnull=True,
+                                             defaults={})
+        CartItem.objects.filter(cart=cart).delete()
+        CartItem.objects.bulk_create([
+            CartItem(cart=cart, product_id=product_id, quantity=quantity,
+                     price=prices.get(product_id))
+            for product_id, quantity in quantities.items()
+            if product_id in existing_products
+        ])
+    return cart
+
+
+def _synchronize_guest_cart_from_redis(user, cart_id):
+    storage = RedisCartStorage()
+    if not storage.is_valid_cart_id(cart_id):
+        return
+
+    guest_quantities, guest_prices = storage.pop_items(cart_id)
+    # Корзина могла быть перенесена в БД при неудачной попытке оформления
+    Cart.objects.filter(pk=cart_id, user__isnull=True).delete()
+    if not guest_quantities:
+        return
+
+    user_cart, _ = Cart.objects.get_or_create(user=user)
+    user_items = {item.product_id: item
+                  for item in CartItem.objects.filter(cart=user_cart)}
+    existing_products = set(
+        Product.objects.filter(pk__in=list(guest_quantities))
+                       .values_list("pk", flat=True)
+    )
 
     update_quantity_items = []
-    update_cart_items = []
+    new_items = []
 
-    for guest_item in guest_items:
-        if (guest_item_product_id := guest_item.product.pk) in user_items:
-            user_item = user_items[guest_item_product_id]
-            user_item.quantity += guest_item.quantity
+    for product_id, quantity in guest_quantities.items():
+        if product_id in user_items:
+            user_item = user_items[product_id]
+            user_item.quantity += quantity
             update_quantity_items.append(user_item)
-        else:
-            guest_item.cart = user_cart
-            update_cart_items.append(guest_item)
-    
-    if update_cart_items:
-        CartItem.objects.bulk_update(update_cart_items, ["cart"])
+        elif product_id in existing_products:
+            new_items.append(CartItem(cart=user_cart, product_id=product_id,
+                                      quantity=quantity,
+                                      price=guest_prices.get(product_id)))
+
+    if new_items:
+        CartItem.objects.bulk_create(new_items)
     if update_quantity_items:
         CartItem.objects.bulk_update(update_quantity_items, ["quantity"])
-    
-    guest_cart.delete()
+
+
+def synchronize_carts(user, cookies):
+    """
+    Переносит гостевую корзину из cookie в корзину пользователя.
+    Идемпотентна: гостевая корзина блокируется на время переноса и
+    удаляется, поэтому параллельные и повторные вызовы ничего не делают.
+    """
+    cart_id = cookies.get("cart_id")
+    if not cart_id:
+        return
+
+    if settings.CART_STORAGE_BACKEND == "redis":
+        return _synchronize_guest_cart_from_redis(user, cart_id)
+
+    with transaction.atomic():
+        try:
+            guest_cart = (Cart.objects.select_for_update()
+                                      .get(pk=cart_id, user__isnull=True))
+        except (Cart.DoesNotExist, ValidationError):
+            return
+        user_cart, _ = Cart.objects.get_or_create(user=user)
+
+        user_items = {item.product_id: item
+                      for item in CartItem.objects.filter(cart=user_cart)}
+        guest_items = CartItem.objects.filter(cart=guest_cart)
+
+        update_quantity_items = []
+        update_cart_items = []
+
+        for guest_item in guest_items:
+            if guest_item.product_id in user_items:
+                user_item = user_items[guest_item.product_id]
+                user_item.quantity += guest_item.quantity
+                update_quantity_items.append(user_item)
+            else:
+                guest_item.cart = user_cart
+                update_cart_items.append(guest_item)
+        
+        if update_cart_items:
+            CartItem.objects.bulk_update(update_cart_items, ["cart"])
+        if update_quantity_items:
+            CartItem.objects.bulk_update(update_quantity_items, ["quantity"])
+        
+        guest_cart.delete()
 
 
 def clear_cart(cart, is_authenticated):
+    if (not is_authenticated and settings.CART_STORAGE_BACKEND == "redis"
+            and cart.cart_id):
+        # Redis не участвует в транзакции: корзина очищается только после
+        # фиксации заказа, иначе при откате гость потеряет ее без заказа
+        cart_id = cart.cart_id
+        transaction.on_commit(lambda: RedisCartStorage().clear(cart_id))
+    if isinstance(cart, DetachedCart):
+        return
+
     if is_authenticated:
         CartItem.objects.filter(cart=cart).delete()
     else:
@@ -0,0 +1,177 @@
+import uuid
+from decimal import Decimal
+
+from django.conf import settings
+from django_redis import get_redis_connection
+
+from goods.models import Product
+from .models import CartItem
+
+
+class DetachedCart:
+    """
+    Корзина без строки в таблице Cart: пустая корзина, которую ещё
+    не создали, или гостевая корзина, хранящаяся в Redis.
+    Сериализуется CartSerializer так же, как Cart.
+    """
+    def __init__(self, cart_id=None, user=None, items=()):
+        self.cart_id = cart_id
+        self.user = user
+        self.items = list(items)
+
+    @property
+    def user_id(self):
+        return self.user.pk if self.user else None
+
+    @property
+    def total_price(self):
+        return sum(item.cost for item in self.items)
+
+
+class RedisCartStorage:
+    """
+    Гостевые корзины в виде хэшей Redis: product_id -> quantity и
+    price:product_id -> цена товара при последнем добавлении (как
+    CartItem.price), по которой при оформлении заказа проверяется цена
+    """
+    key_prefix = "cart:guest"
+    price_prefix = "price:"
+
+    def __init__(self):
+        self.connection = get_redis_connection("default")
+        self.ttl = settings.GUEST_CART_TTL
+
+    @staticmethod
+    def is_valid_cart_id(cart_id):
+        try:
+            uuid.UUID(str(cart_id))
+        except ValueError:
+            return False
+        return True
+
+    def _key(self, cart_id):
+        return f"{self.key_prefix}:{cart_id}"
+
+    def _price_field(self, product_id):
+        return f"{self.price_prefix}{product_id}"
+
+    def _parse(self, fields):
+        """Поля хэша -> ({product_id: quantity}, {product_id: цена})"""
+        quantities, prices = {}, {}
+        for field, value in fields.items():
+            field = field.decode()
+            if field.startswith(self.price_prefix):
+                prices[int(field[len(self.price_prefix):])] = Decimal(value.decode())
+            else:
+                quantities[int(field)] = int(value)
+        return quantities, prices
+
+    def get_items(self, cart_id):
+        return self.get_entries(cart_id)[0]
+
+    def get_entries(self, cart_id):
+        """Количества и цены при добавлении одним HGETALL"""
+        return self._parse(self.connection.hgetall(self._key(cart_id)))
+
+    def add_item(self, cart_id, product_id, quantity=1, price=None):
+        key = self._key(cart_id)
+        pipe = self.connection.pipeline()
+        pipe.hincrby(key, product_id, quantity)
+        if price is not None:
+            pipe.hset(key, self._price_field(product_id), str(price))
+        pipe.expire(key, self.ttl)
+        return pipe.execute()[0]
+
+    def reduce_item(self, cart_id, product_id):
+        """
+        Атомарно (WATCH/MULTI) уменьшает количество на 1.
+        Возвращает None, если товара нет в корзине
+        """
+        key = self._key(cart_id)
+
+        def update(pipe):
+            quantity = pipe.hget(key, product_id)
+            if quantity is None:
+                return None
+
+            new_quantity = int(quantity) - 1
+            pipe.multi()
+            if new_quantity > 0:
+                pipe.hset(key, product_id, new_quantity)
+            else:
+                pipe.hdel(key, product_id, self._price_field(product_id))
+                new_quantity = 0
+            pipe.expire(key, self.ttl)
+            return new_quantity
+
+        return self.connection.transaction(update, key, value_from_callable=True)
+
+    def apply(self, cart_id, resolve, prices=None):
+        """
+        Атомарно (WATCH/MULTI) заменяет количества: resolve получает текущее
+        содержимое корзины и возвращает {product_id: quantity}, 0 — удалить.
+        prices — {product_id: цена}, сохраняются для оставшихся товаров
+        """
+        key = self._key(cart_id)
+
+        def update(pipe):
+            current, _ = self._parse(pipe.hgetall(key))
+            quantities = resolve(current)
+
+            pipe.multi()
+            for product_id, quantity in quantities.items():
+                if quantity > 0:
+                    pipe.hset(key, product_id, quantity)
+                    if prices and product_id in prices:
+                        pipe.hset(key, self._price_field(product_id),
+                                  str(prices[product_id]))
+                else:
+                    pipe.hdel(key, product_id, self._price_field(product_id))
+            pipe.expire(key, self.ttl)
+
+        self.connection.transaction(update, key)
+
+    def set_prices(self, cart_id, prices):
+        """Заменяет цены при добавлении, {product_id: цена}"""
+        if prices:
+            self.connection.hset(self._key(cart_id), mapping={
+                self._price_field(product_id): str(price)
+                for product_id, price in prices.items()
+            })
+
+    def remove_items(self, cart_id, product_ids):
+        if product_ids:
+            self.connection.hdel(self._key(cart_id), *product_ids, *[
+                self._price_field(product_id) for product_id in product_ids
+            ])
+
+    def pop_items(self, cart_id):
+        """
+        Атомарно забирает содержимое корзины и удаляет её.
+        Возвращает количества и цены, как get_entries
+        """
+        key = self._key(cart_id)
+        pipe = self.connection.pipeline()
+        pipe.hgetall(key)
+        pipe.delete(key)
+        items, _ = pipe.execute()
+        return self._parse(items)
+
+    def clear(self, cart_id):
+        self.connection.delete(self._key(cart_id))
+
+    def load(self, cart_id):
+        """Собирает DetachedCart; товары загружаются одним запросом"""
+        quantities, prices = self.get_entries(cart_id)
+        products = (Product.objects.select_related("category")
+                    .in_bulk(list(quantities)))
+
+        items = [
+            # id позиции гостевой корзины совпадает с id товара
+            CartItem(id=product_id, cart_id=cart_id,
+                     product=products[product_id], quantity=quantity,
+                     price=prices.get(product_id))
+            for product_id, quantity in quantities.items()
+            if product_id in products
+        ]
+        return DetachedCart(cart_id=cart_id, items=items)
@@ -8,5 +8,6 @@ app_name = "cart"
 urlpatterns = [
     path("my-cart/", views.CartAPIView.as_view(), name="my_cart"),
     path("my-cart/items/<int:pk>/", views.CartItemAPIView.as_view(), name="update_cart_item"),
+    path("my-cart/items/batch/", views.CartBatchAPIView.as_view(), name="cart_items_batch"),
     path("my-cart/items/", views.CartItemAPIView.as_view(), name="cart_items"),
 ]
\ No newline at end of file
@@ -1,20 +1,34 @@
 from rest_framework import generics
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 from rest_framework import status
 
-from .models import Cart, CartItem
+from .models import CartItem
 from . import serializers
-from .services import get_or_create_cart, clear_cart
+from .services import (
+    get_existing_cart, clear_cart, set_cart_cookie, uses_redis_storage,
+    reduce_guest_cart_item, get_cart_queryset
+)
+from .mixins import MergeGuestCartMixin
 from .permission import IsCartOwner
+from .storage import DetachedCart
 
 
-class CartAPIView(generics.RetrieveDestroyAPIView):
-    queryset = Cart.objects.prefetch_related("items").all()
+class CartAPIView(MergeGuestCartMixin, generics.RetrieveDestroyAPIView):
+    queryset = get_cart_queryset()
     serializer_class = serializers.CartSerializer
     permission_classes = [IsCartOwner]
+    guest_cart_methods = ("GET", )
 
     def get_object(self):
-        cart = get_or_create_cart(self.request.user, self.request.COOKIES)
+        cart = get_existing_cart(self.request.user, self.request.COOKIES,
+                                 queryset=self.get_queryset())
+        if cart is None:
+            # Пустая корзина без записи в БД: чтение ничего не создаёт
+            cart = DetachedCart(
+                cart_id=self.request.COOKIES.get("cart_id"),
+                user=self.request.user if self.request.user.is_authenticated else None
+            )
         self.check_object_permissions(self.request, cart)
         return cart
 
@@ -27,27 +41,37 @@ class CartAPIView(generics.RetrieveDestroyAPIView):
                         status=status.HTTP_200_OK)
 
 
-class CartItemAPIView(generics.UpdateAPIView,
+class CartItemAPIView(MergeGuestCartMixin,
+                      generics.UpdateAPIView,
                       generics.CreateAPIView):
     queryset = CartItem.objects.select_related("cart").all()
     permission_classes = [IsCartOwner]
+    guest_cart_methods = ("POST", )
 
     def get_serializer_class(self):
         if self.request.method == "POST":
             return serializers.CartAddItemSerializer
         return serializers.CartReduceItemQuantitySerializer
-        
-    def get_serializer_context(self):
-        context = super().get_serializer_context()
-        context["request"] = self.request
-        
-        if self.request.method == "POST":
-            context["request"].cart = get_or_create_cart(self.request.user,
-                                                        self.request.COOKIES)
-        
-        return context
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        cart_item = serializer.save()
+
+        response = Response(serializer.data, status=status.HTTP_201_CREATED)
+        if (not request.user.is_authenticated
+                and request.COOKIES.get("cart_id") != str(cart_item.cart_id)):
+            set_cart_cookie(response, cart_item.cart_id)
+        return response
     
     def partial_update(self, request, *args, **kwargs):
+        if uses_redis_storage(request.user):
+            # В гостевой корзине из Redis pk позиции — это id товара
+            cart = reduce_guest_cart_item(request.COOKIES, kwargs["pk"])
+            if cart is None:
+                raise NotFound()
+            return Response({"cart": serializers.CartSerializer(cart).data})
+
         target_item = self.get_object()
         serializer = self.get_serializer(target_item,
                                          data=request.data,
@@ -59,3 +83,19 @@ class CartItemAPIView(generics.UpdateAPIView,
             updated_item.delete()
         return Response(serializer.data)
 
+
+class CartBatchAPIView(MergeGuestCartMixin, generics.GenericAPIView):
+    serializer_class = serializers.CartBatchSerializer
+    permission_classes = [IsCartOwner]
+    guest_cart_methods = ("POST", )
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        cart = serializer.save()
+
+        response = Response(serializers.CartSerializer(cart).data)
+        if (not request.user.is_authenticated and cart.cart_id
+                and request.COOKIES.get("cart_id") != str(cart.cart_id)):
+            set_cart_cookie(response, cart.cart_id)
+        return response
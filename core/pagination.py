@@ -0,0 +1,167 @@
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class SignedCursorPagination(BasePagination):
+    """
+    Keyset-пагинация: страница выбирается условием WHERE по последней
+    увиденной позиции, а не OFFSET, и без COUNT(*).
+    Курсор подписан, поэтому клиент не может подменить позицию.
+    Подклассы задают orderings (имя -> поля с id последним),
+    default_ordering и salt.
+    """
+    cursor_query_param = "cursor"
+    ordering_query_param = "ordering"
+    limit_query_param = "limit"
+    default_limit = 10
+    max_limit = 30
+    orderings = {}
+    default_ordering = None
+    salt = None
+    invalid_cursor_message = "Неверный курсор"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.limit = self.get_limit(request)
+
+        cursor = self.decode_cursor(request)
+        if cursor is None:
+            self.ordering = self.get_ordering(request)
+            position, reverse = None, False
+        else:
+            self.ordering, position, reverse = cursor
+
+        fields = self.orderings[self.ordering]
+        if reverse:
+            fields = tuple(self._invert(field) for field in fields)
+
+        results = self.fetch_page(queryset, fields, position)
+        has_more = len(results) > self.limit
+        results = results[:self.limit]
+
+        if reverse:
+            results.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+
+        self.next_position = (self._get_position(results[-1])
+                              if has_next and results else None)
+        self.previous_position = (self._get_position(results[0])
+                                  if has_previous and results else None)
+        return results
+
+    def fetch_page(self, queryset, fields, position):
+        """Возвращает до limit + 1 записей после position в порядке fields"""
+        queryset = queryset.order_by(*fields)
+        if position is not None:
+            queryset = queryset.filter(
+                self._after_position(queryset.model, fields, position)
+            )
+        return list(queryset[:self.limit + 1])
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.default_limit
+        if limit <= 0:
+            return self.default_limit
+        return min(limit, self.max_limit)
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get(self.ordering_query_param)
+        if ordering in self.orderings:
+            return ordering
+        return self.default_ordering
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def encode_cursor(self, position, reverse):
+        token = signing.dumps(
+            {"o": self.ordering, "p": position, "r": reverse},
+            salt=self.salt,
+            compress=True,
+        )
+        url = remove_query_param(self.base_url, self.ordering_query_param)
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+
+        try:
+            cursor = signing.loads(token, salt=self.salt)
+            ordering, position, reverse = cursor["o"], cursor["p"], cursor["r"]
+        except (signing.BadSignature, KeyError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if (ordering not in self.orderings
+                or not isinstance(position, list)
+                or len(position) != len(self.orderings[ordering])):
+            raise NotFound(self.invalid_cursor_message)
+        return ordering, position, bool(reverse)
+
+    def _get_position(self, instance):
+        position = []
+        for field in self.orderings[self.ordering]:
+            value = getattr(instance, field.lstrip("-"))
+            if hasattr(value, "isoformat"):
+                value = value.isoformat()
+            elif not isinstance(value, (int, str)):
+                value = str(value)
+            position.append(value)
+        return position
+
+    def _after_position(self, model, fields, position):
+        try:
+            values = [model._meta.get_field(field.lstrip("-")).to_python(value)
+                      for field, value in zip(fields, position)]
+        except ValidationError:
+            raise NotFound(self.invalid_cursor_message)
+
+        # (a, b) > (x, y)  <=>  a > x OR (a = x AND b > y)
+        condition = Q()
+        for index, field in enumerate(fields):
+            lookup = "lt" if field.startswith("-") else "gt"
+            step = Q(**{f"{field.lstrip('-')}__{lookup}": values[index]})
+            for prev_field, prev_value in zip(fields[:index], values[:index]):
+                step &= Q(**{prev_field.lstrip("-"): prev_value})
+            condition |= step
+        return condition
+
+    @staticmethod
+    def _invert(field):
+        return field[1:] if field.startswith("-") else f"-{field}"
@@ -35,4 +35,5 @@ urlpatterns = [
     path('api/v1/', include('goods.urls', namespace='goods')),
     path('api/v1/', include('cart.urls', namespace='cart')),
     path('api/v1/my-orders/', include('orders.urls', namespace='orders')),
+    path('api/v1/analytics/', include('analytics.urls', namespace='analytics')),
 ]
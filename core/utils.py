@@ -1,3 +1,6 @@
+from datetime import datetime, time
+
+from django.utils import timezone
 from rest_framework.views import exception_handler
 
 
@@ -9,3 +12,8 @@ def custom_exception_handler(exc, context):
         response.data['status_code'] = response.status_code
 
     return response
+
+
+def day_start(day):
+    """Начало дня day в текущей временной зоне: граница для фильтров по created"""
+    return timezone.make_aware(datetime.combine(day, time.min))
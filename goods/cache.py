@@ -0,0 +1,74 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+
+
+PRODUCTS_NAMESPACE = "products"
+CATEGORIES_NAMESPACE = "categories"
+
+
+def _version_key(namespace):
+    return f"goods:cache:{namespace}:version"
+
+
+def get_cache_version(namespace):
+    cache = caches["default"]
+    # Начальное значение — текущее время, чтобы после вытеснения ключа
+    # версии из Redis старые записи не стали снова актуальными
+    return cache.get_or_set(_version_key(namespace), time.time_ns(), timeout=None)
+
+
+def bump_cache_version(*namespaces):
+    cache = caches["default"]
+    for namespace in namespaces:
+        try:
+            cache.incr(_version_key(namespace))
+        except ValueError:
+            cache.add(_version_key(namespace), time.time_ns(), timeout=None)
+
+
+def build_cache_key(request, namespace, action, lookup):
+    query = sorted(
+        (param, value)
+        for param, values in request.query_params.lists()
+        for value in values
+        if value != ""
+    )
+    raw_key = repr((request.get_host(), request.path, action, lookup, query))
+    digest = hashlib.md5(raw_key.encode()).hexdigest()
+    return f"goods:cache:{namespace}:{get_cache_version(namespace)}:{digest}"
+
+
+class CatalogCacheMixin:
+    """
+    Кэширует ответы list/retrieve в Redis. Ключ версионируется по
+    cache_namespace, версия увеличивается сигналами из goods.signals.
+    """
+    cache_namespace = None
+    cache_anonymous_only = False
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(super().retrieve, request, *args, **kwargs)
+
+    def _cached_response(self, handler, request, *args, **kwargs):
+        if self.cache_anonymous_only and request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+
+        cache = caches["default"]
+        key = build_cache_key(request, self.cache_namespace,
+                              self.action, sorted(kwargs.items()))
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, timeout=settings.CATALOG_CACHE_TIMEOUT)
+        return response
@@ -0,0 +1,37 @@
+import operator
+from functools import reduce
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F
+from rest_framework.filters import SearchFilter
+
+
+class ProductSearchFilter(SearchFilter):
+    """
+    Полнотекстовый поиск по Product.search_vector (GIN-индекс) вместо
+    ILIKE по name/description. Результаты сортируются по релевантности.
+    """
+    search_configs = ("russian", "english")
+
+    def get_search_query(self, request):
+        text = request.query_params.get(self.search_param, "")
+        text = text.replace("\x00", "").strip()
+        if not text:
+            return None
+
+        return reduce(operator.or_, (
+            SearchQuery(text, config=config, search_type="websearch")
+            for config in self.search_configs
+        ))
+
+    def filter_queryset(self, request, queryset, view):
+        query = self.get_search_query(request)
+        if query is None:
+            return queryset
+
+        return (
+            queryset
+            .filter(search_vector=query)
+            .annotate(search_rank=SearchRank(F("search_vector"), query))
+            .order_by("-search_rank", "id")
+        )
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:50
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+SEARCH_VECTOR_SQL = """
+    setweight(to_tsvector('russian', coalesce(NEW.name, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A') ||
+    setweight(to_tsvector('russian', coalesce(NEW.description, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B')
+"""
+
+CREATE_TRIGGER_SQL = f"""
+CREATE FUNCTION goods_product_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := {SEARCH_VECTOR_SQL};
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER goods_product_search_vector_trigger
+BEFORE INSERT OR UPDATE OF name, description ON goods_product
+FOR EACH ROW EXECUTE FUNCTION goods_product_search_vector_update();
+
+UPDATE goods_product SET search_vector = {SEARCH_VECTOR_SQL.replace("NEW.", "")};
+"""
+
+DROP_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS goods_product_search_vector_trigger ON goods_product;
+DROP FUNCTION IF EXISTS goods_product_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goods', '0004_product_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='goods_produ_search__077fd7_gin'),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER_SQL, DROP_TRIGGER_SQL),
+    ]
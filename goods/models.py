@@ -1,3 +1,5 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils.text import slugify
 
@@ -35,13 +37,20 @@ class Product(models.Model):
     available = models.BooleanField(default=True, verbose_name="В наличии")
     created = models.DateTimeField(auto_now_add=True, verbose_name="Добавлен")
     updated = models.DateTimeField(auto_now=True, verbose_name="Обновлен")
+    # Заполняется триггером goods_product_search_vector_trigger
+    # (см. миграцию 0005), поэтому обновляется и при bulk-операциях.
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         ordering = ["name"]
         indexes = [
+            GinIndex(fields=["search_vector"]),
             models.Index(fields=["id"]),
             models.Index(fields=["name"]),
             models.Index(fields=["-created"]),
+            models.Index(fields=["name", "id"]),
+            models.Index(fields=["-created", "-id"]),
+            models.Index(fields=["price", "id"]),
         ]
         verbose_name = "Товар"
         verbose_name_plural = "Товары"
@@ -1,6 +1,21 @@
 from rest_framework.pagination import LimitOffsetPagination
 
+from core.pagination import SignedCursorPagination
+
 
 class ProductsPagination(LimitOffsetPagination):
     default_limit = 10
-    max_limit = 30
\ No newline at end of file
+    max_limit = 30
+
+
+class ProductsCursorPagination(SignedCursorPagination):
+    """Каталог: keyset-пагинация по имени, новизне или цене"""
+    default_limit = 10
+    max_limit = 30
+    orderings = {
+        "name": ("name", "id"),
+        "-created": ("-created", "-id"),
+        "price": ("price", "id"),
+    }
+    default_ordering = "name"
+    salt = "goods.pagination.cursor"
@@ -0,0 +1,19 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .cache import bump_cache_version, PRODUCTS_NAMESPACE, CATEGORIES_NAMESPACE
+from .models import Product, Category
+
+
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_products_cache(sender, **kwargs):
+    transaction.on_commit(lambda: bump_cache_version(PRODUCTS_NAMESPACE))
+
+
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_categories_cache(sender, **kwargs):
+    # category_name входит в ответы ProductViewSet
+    transaction.on_commit(
+        lambda: bump_cache_version(CATEGORIES_NAMESPACE, PRODUCTS_NAMESPACE)
+    )
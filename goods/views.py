@@ -2,22 +2,36 @@ from rest_framework import generics
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets
 from rest_framework.permissions import AllowAny, IsAdminUser
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import OrderingFilter
 
 from . import serializers
 from .models import Product, Category
-from .pagination import ProductsPagination
+from .cache import CatalogCacheMixin, PRODUCTS_NAMESPACE, CATEGORIES_NAMESPACE
+from .filters import ProductSearchFilter
+from .pagination import ProductsPagination, ProductsCursorPagination
 
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(CatalogCacheMixin, viewsets.ModelViewSet):
     queryset = Product.objects.select_related("category").all()
     serializer_class = serializers.ProductSerializer
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, ProductSearchFilter, OrderingFilter]
     filterset_fields = ["category", "price", "available"]
     search_fields = ["name", "description"]
     ordering_fields = ["price", "created_at"]
     pagination_class = ProductsPagination
+    cursor_pagination_class = ProductsCursorPagination
+    cache_namespace = PRODUCTS_NAMESPACE
+    cache_anonymous_only = True
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            if self.request.query_params.get("pagination") == "cursor":
+                self._paginator = self.cursor_pagination_class()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
     
     def get_permissions(self):
         if self.action in ("list", "retrieve"):
@@ -27,7 +41,8 @@ class ProductViewSet(viewsets.ModelViewSet):
         return [permission() for permission in permission_classes]
 
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class CategoryViewSet(CatalogCacheMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Category.objects.all()
     serializer_class = serializers.CategorySerializer
-    lookup_field = "slug"
\ No newline at end of file
+    lookup_field = "slug"
+    cache_namespace = CATEGORIES_NAMESPACE
\ No newline at end of file
@@ -1,6 +1,30 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 
 from .models import Order, OrderItem
+from .services import transition_orders
+
+
+def make_status_action(status):
+    def action(modeladmin, request, queryset):
+        updated, skipped = transition_orders(
+            queryset.values_list("id", flat=True), status
+        )
+        modeladmin.message_user(
+            request, f"Переведено заказов: {len(updated)}", messages.SUCCESS
+        )
+        if skipped:
+            shown = ", ".join(map(str, skipped[:20]))
+            if len(skipped) > 20:
+                shown += ", …"
+            modeladmin.message_user(
+                request,
+                f"Пропущено заказов не в статусе "
+                f"«{Order.STATUS_FLOW[status].label}»: {len(skipped)} ({shown})",
+                messages.WARNING
+            )
+
+    action.__name__ = f"mark_{status}"
+    return admin.action(description=f"Перевести в статус «{status.label}»")(action)
 
 
 class OrderItemInline(admin.TabularInline):
@@ -11,10 +35,14 @@ class OrderItemInline(admin.TabularInline):
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = ["id", "first_name", "last_name", "email",
-                    "address", "city", "paid", "created",
-                    "updated"]
-    list_filter = ["paid", "created", "updated"]
+                    "address", "city", "item_count", "total",
+                    "paid", "created", "updated"]
+    list_filter = ["status", "paid", "created", "updated"]
+    # Статус меняется только действиями, чтобы соблюдался STATUS_FLOW
+    # и писалось событие в outbox
+    readonly_fields = ["status", "subtotal", "total", "item_count"]
     inlines = [OrderItemInline]
+    actions = [make_status_action(status) for status in Order.STATUS_FLOW]
 
     def get_changeform_initial_data(self, request):
         initial = super().get_changeform_initial_data(request)
@@ -27,7 +55,12 @@ class OrderAdmin(admin.ModelAdmin):
         return initial
 
     def get_readonly_fields(self, request, obj=None):
-        readonly_fields = super().get_readonly_fields(request, obj)
+        readonly_fields = list(super().get_readonly_fields(request, obj))
         if obj and obj.user:
             readonly_fields.extend(["first_name", "last_name", "email"])
         return readonly_fields
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # Позиции могли измениться в инлайнах — пересчитываем итоги заказа
+        form.instance.update_totals()
@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
+from .partitions import ensure_archive_partitions
+
+
+ARCHIVED_ORDER_FIELDS = [
+    "id", "order_uuid", "user_id", "first_name", "last_name", "email",
+    "address", "city", "created", "updated", "paid", "status",
+    "subtotal", "total", "item_count",
+]
+
+
+def archive_completed_orders(older_than_days=None, batch_size=None):
+    """
+    Переносит выполненные заказы старше older_than_days дней вместе с
+    позициями в секционированный архив. Работает пачками, каждая пачка —
+    отдельная транзакция. Возвращает число перенесённых заказов.
+    """
+    if older_than_days is None:
+        older_than_days = settings.ORDER_ARCHIVE_AFTER_DAYS
+    if batch_size is None:
+        batch_size = settings.ORDER_ARCHIVE_BATCH_SIZE
+
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    archived = 0
+    while True:
+        moved = _archive_batch(cutoff, batch_size)
+        archived += moved
+        if moved < batch_size:
+            return archived
+
+
+def _archive_batch(cutoff, batch_size):
+    with transaction.atomic():
+        orders = list(
+            Order.objects.select_for_update(skip_locked=True)
+            .filter(status=Order.OrderStatus.COMPLETED, created__lt=cutoff)
+            .order_by("created", "id")[:batch_size]
+        )
+        if not orders:
+            return 0
+
+        order_ids = [order.id for order in orders]
+        created = {order.id: order.created for order in orders}
+        items = list(OrderItem.objects.filter(order_id__in=order_ids))
+
+        ensure_archive_partitions(created.values())
+        ArchivedOrder.objects.bulk_create([
+            ArchivedOrder(**{field: getattr(order, field)
+                             for field in ARCHIVED_ORDER_FIELDS})
+            for order in orders
+        ])
+        ArchivedOrderItem.objects.bulk_create([
+            ArchivedOrderItem(id=item.id,
+                              order_id=item.order_id,
+                              order_created=created[item.order_id],
+                              product_id=item.product_id,
+                              price=item.price,
+                              quantity=item.quantity)
+            for item in items
+        ])
+
+        OrderItem.objects.filter(order_id__in=order_ids).delete()
+        Order.objects.filter(id__in=order_ids).delete()
+    return len(orders)
@@ -0,0 +1,34 @@
+import logging
+import smtplib
+
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.template.loader import render_to_string
+
+
+logger = logging.getLogger(__name__)
+
+
+def build_order_email(order, subject, template_name):
+    message = EmailMultiAlternatives(subject=subject, body="", to=[order.email])
+    message.attach_alternative(
+        render_to_string(template_name, {"order": order}),
+        "text/html"
+    )
+    return message
+
+
+def deliver_messages(messages):
+    """
+    Отправляет письма через одно SMTP-соединение. Ошибка отдельного
+    письма не прерывает отправку остальных. Возвращает индексы
+    неотправленных писем. Ошибка открытия соединения пробрасывается.
+    """
+    failed = []
+    with get_connection(fail_silently=False) as connection:
+        for index, message in enumerate(messages):
+            try:
+                connection.send_messages([message])
+            except (smtplib.SMTPException, OSError):
+                logger.exception("Не удалось отправить письмо на %s", message.to)
+                failed.append(index)
+    return failed
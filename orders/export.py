@@ -0,0 +1,130 @@
+import csv
+import heapq
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+
+from core.utils import day_start
+from .models import ArchivedOrder, Order, OrderItem
+from .services import attach_archived_items
+
+
+ORDER_FIELDS = ["id", "order_uuid", "created", "status", "paid",
+                "first_name", "last_name", "email", "address", "city",
+                "subtotal", "total", "item_count"]
+ITEM_FIELDS = ["product_id", "product_name", "price", "quantity", "cost"]
+
+
+class Echo:
+    """Псевдо-файл для csv.writer: возвращает строку вместо записи"""
+    def write(self, value):
+        return value
+
+
+def get_export_queryset(date_from=None, date_to=None, status=None):
+    """
+    Заказы для выгрузки. Позиции подгружаются отдельным запросом
+    на каждую пачку из iterator(chunk_size=...), а не на весь период.
+    """
+    orders = Order.objects.all()
+    # Границы дня вместо created__date, чтобы работал индекс по created
+    if date_from is not None:
+        orders = orders.filter(created__gte=day_start(date_from))
+    if date_to is not None:
+        orders = orders.filter(created__lt=day_start(date_to + timedelta(days=1)))
+    if status is not None:
+        orders = orders.filter(status=status)
+
+    return orders.order_by("created", "id").prefetch_related(
+        Prefetch("items",
+                 queryset=OrderItem.objects.select_related("product")
+                                           .order_by("id"))
+    )
+
+
+def get_archived_export_queryset(date_from=None, date_to=None, status=None):
+    """
+    Архивные заказы за период. Архив запрашивается всегда: заказы туда
+    можно перенести раньше ORDER_ARCHIVE_AFTER_DAYS (archive_orders
+    --older-than-days), а границы по created отсекают лишние секции.
+    """
+    orders = ArchivedOrder.objects.all()
+    if date_from is not None:
+        orders = orders.filter(created__gte=day_start(date_from))
+    if date_to is not None:
+        orders = orders.filter(created__lt=day_start(date_to + timedelta(days=1)))
+    if status is not None:
+        orders = orders.filter(status=status)
+    return orders.order_by("created", "id")
+
+
+def iter_export_orders(date_from=None, date_to=None, status=None):
+    """
+    Заказы и архивные заказы за период в общем порядке (created, id).
+    Обе выборки читаются пачками и сливаются по мере чтения.
+    """
+    orders = _iter_orders(get_export_queryset(date_from, date_to, status))
+    archived = _iter_archived_orders(
+        get_archived_export_queryset(date_from, date_to, status)
+    )
+    return heapq.merge(orders, archived,
+                       key=lambda order: (order.created, order.id))
+
+
+def _iter_orders(queryset):
+    return queryset.iterator(chunk_size=settings.ORDER_EXPORT_CHUNK_SIZE)
+
+
+def _iter_archived_orders(queryset):
+    # Позиции архива подгружаются одним запросом на пачку заказов
+    chunk = []
+    for order in _iter_orders(queryset):
+        chunk.append(order)
+        if len(chunk) == settings.ORDER_EXPORT_CHUNK_SIZE:
+            yield from attach_archived_items(chunk)
+            chunk = []
+    yield from attach_archived_items(chunk)
+
+
+def _order_items(order):
+    # У архивных заказов позиции уже лежат списком (attach_archived_items)
+    if isinstance(order, ArchivedOrder):
+        return order.items
+    return order.items.all()
+
+
+def _order_values(order):
+    return [getattr(order, field) for field in ORDER_FIELDS]
+
+
+def _item_values(item):
+    return [item.product_id, item.product.name, item.price,
+            item.quantity, item.cost]
+
+
+def stream_csv(orders):
+    """Строка на каждую позицию; заказ без позиций — одна строка"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(
+        [f"order_{field}" for field in ORDER_FIELDS]
+        + [f"item_{field}" for field in ITEM_FIELDS]
+    )
+    for order in orders:
+        order_values = _order_values(order)
+        items = _order_items(order)
+        if not items:
+            yield writer.writerow(order_values + [""] * len(ITEM_FIELDS))
+        for item in items:
+            yield writer.writerow(order_values + _item_values(item))
+
+
+def stream_ndjson(orders):
+    """JSON-объект заказа с позициями на каждой строке"""
+    for order in orders:
+        data = dict(zip(ORDER_FIELDS, _order_values(order)))
+        data["items"] = [dict(zip(ITEM_FIELDS, _item_values(item)))
+                         for item in _order_items(order)]
+        yield json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
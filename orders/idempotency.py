@@ -0,0 +1,97 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+_PROCESSING = "processing"
+_COMPLETED = "completed"
+
+
+def _request_scope(request):
+    if request.user.is_authenticated:
+        return f"user:{request.user.pk}"
+    return f"cart:{request.COOKIES.get('cart_id', '')}"
+
+
+def _request_fingerprint(request):
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def build_idempotency_key(request, key):
+    digest = hashlib.sha256(f"{_request_scope(request)}:{key}".encode()).hexdigest()
+    return f"orders:idempotency:{digest}"
+
+
+class IdempotentCreateMixin:
+    """
+    Учитывает заголовок Idempotency-Key у POST: повтор запроса с тем же
+    ключом получает сохранённый в Redis ответ, а не оформляет заказ заново.
+    Пока первый запрос выполняется, повторы получают 409. Ответы с
+    ошибкой не сохраняются — с тем же ключом можно повторить попытку.
+    """
+    def post(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            return super().post(request, *args, **kwargs)
+
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {"error": f"Некорректный заголовок {IDEMPOTENCY_HEADER}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        cache = caches["default"]
+        cache_key = build_idempotency_key(request, key)
+        fingerprint = _request_fingerprint(request)
+
+        acquired = cache.add(
+            cache_key,
+            {"state": _PROCESSING, "fingerprint": fingerprint},
+            timeout=settings.IDEMPOTENCY_LOCK_TIMEOUT
+        )
+        if not acquired:
+            return self._replay(cache.get(cache_key), fingerprint)
+
+        completed = False
+        try:
+            response = super().post(request, *args, **kwargs)
+            if status.is_success(response.status_code):
+                cache.set(cache_key, {
+                    "state": _COMPLETED,
+                    "fingerprint": fingerprint,
+                    "status": response.status_code,
+                    "data": response.data,
+                }, timeout=settings.IDEMPOTENCY_KEY_TTL)
+                completed = True
+            return response
+        finally:
+            if not completed:
+                cache.delete(cache_key)
+
+    @staticmethod
+    def _replay(stored, fingerprint):
+        if stored is None or stored["state"] == _PROCESSING:
+            return Response(
+                {"error": "Запрос с этим ключом идемпотентности "
+                          "ещё выполняется"},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        if stored["fingerprint"] != fingerprint:
+            return Response(
+                {"error": "Ключ идемпотентности уже использован "
+                          "с другими данными запроса"},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY
+            )
+
+        response = Response(stored["data"], status=stored["status"])
+        response["Idempotent-Replayed"] = "true"
+        return response
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from orders.archive import archive_completed_orders
+
+
+class Command(BaseCommand):
+    help = "Переносит выполненные заказы старше заданного возраста в архив"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days", type=int,
+            default=settings.ORDER_ARCHIVE_AFTER_DAYS,
+            help="Возраст заказа в днях, после которого он архивируется",
+        )
+        parser.add_argument(
+            "--batch-size", type=int,
+            default=settings.ORDER_ARCHIVE_BATCH_SIZE,
+            help="Сколько заказов переносится в одной транзакции",
+        )
+
+    def handle(self, *args, **options):
+        archived = archive_completed_orders(
+            older_than_days=options["older_than_days"],
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Заказов перенесено в архив: {archived}"))
@@ -0,0 +1,30 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from orders.outbox import relay_events
+
+
+class Command(BaseCommand):
+    help = "Публикует события заказов из outbox в Celery"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Опубликовать накопившиеся события и завершиться",
+        )
+        parser.add_argument(
+            "--interval", type=float,
+            default=settings.OUTBOX_RELAY_INTERVAL,
+            help="Пауза в секундах, когда новых событий нет",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            published = relay_events()
+            if options["once"]:
+                self.stdout.write(self.style.SUCCESS(f"Опубликовано событий: {published}"))
+                return
+            if not published:
+                time.sleep(options["interval"])
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:19
+
+from django.db import migrations, models
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_order_totals(apps, schema_editor):
+    Order = apps.get_model("orders", "Order")
+    OrderItem = apps.get_model("orders", "OrderItem")
+
+    totals = (
+        OrderItem.objects.filter(order=OuterRef("pk"))
+        .order_by()
+        .values("order")
+    )
+    subtotal = totals.annotate(
+        value=Sum(F("price") * F("quantity"), output_field=DecimalField())
+    ).values("value")
+    item_count = totals.annotate(value=Sum("quantity")).values("value")
+
+    Order.objects.update(
+        subtotal=Coalesce(Subquery(subtotal), 0, output_field=DecimalField()),
+        total=Coalesce(Subquery(subtotal), 0, output_field=DecimalField()),
+        item_count=Coalesce(Subquery(item_count), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_order_order_uuid'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество товаров'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='subtotal',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Сумма товаров'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='total',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Итого'),
+        ),
+        migrations.RunPython(fill_order_totals, migrations.RunPython.noop),
+    ]
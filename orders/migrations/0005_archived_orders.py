@@ -0,0 +1,119 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Архив секционирован по месяцам: секции создаёт orders.partitions
+# при архивации. Первичный ключ секционированной таблицы обязан
+# включать ключ секционирования, поэтому он составной.
+CREATE_PARTITIONED_TABLES = """
+CREATE TABLE orders_archivedorder (
+    id bigint NOT NULL,
+    order_uuid uuid NOT NULL,
+    user_id bigint NULL,
+    first_name varchar(50) NOT NULL,
+    last_name varchar(50) NOT NULL,
+    email varchar(254) NOT NULL,
+    address text NOT NULL,
+    city varchar(100) NOT NULL,
+    created timestamp with time zone NOT NULL,
+    updated timestamp with time zone NOT NULL,
+    paid boolean NOT NULL,
+    status varchar(20) NOT NULL,
+    subtotal numeric(12, 2) NOT NULL,
+    total numeric(12, 2) NOT NULL,
+    item_count integer NOT NULL CHECK (item_count >= 0),
+    archived timestamp with time zone NOT NULL,
+    PRIMARY KEY (id, created)
+) PARTITION BY RANGE (created);
+
+CREATE INDEX orders_archivedorder_user_id_created_idx
+    ON orders_archivedorder (user_id, created DESC);
+
+CREATE TABLE orders_archivedorderitem (
+    id bigint NOT NULL,
+    order_id bigint NOT NULL,
+    order_created timestamp with time zone NOT NULL,
+    product_id bigint NOT NULL,
+    price numeric(10, 2) NOT NULL,
+    quantity integer NOT NULL CHECK (quantity >= 0),
+    PRIMARY KEY (id, order_created)
+) PARTITION BY RANGE (order_created);
+
+CREATE INDEX orders_archivedorderitem_order_id_idx
+    ON orders_archivedorderitem (order_id);
+"""
+
+
+def create_archive_tables(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(CREATE_PARTITIONED_TABLES)
+        return
+
+    for model_name in ("ArchivedOrder", "ArchivedOrderItem"):
+        schema_editor.create_model(apps.get_model("orders", model_name))
+
+
+def drop_archive_tables(apps, schema_editor):
+    for model_name in ("ArchivedOrderItem", "ArchivedOrder"):
+        schema_editor.delete_model(apps.get_model("orders", model_name))
+
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goods', '0005_product_search_vector'),
+        ('orders', '0004_order_user_created_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='ArchivedOrder',
+                    fields=[
+                        ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                        ('order_uuid', models.UUIDField()),
+                        ('first_name', models.CharField(max_length=50)),
+                        ('last_name', models.CharField(max_length=50)),
+                        ('email', models.EmailField(max_length=254)),
+                        ('address', models.TextField()),
+                        ('city', models.CharField(max_length=100)),
+                        ('created', models.DateTimeField()),
+                        ('updated', models.DateTimeField()),
+                        ('paid', models.BooleanField(default=False)),
+                        ('status', models.CharField(choices=[('pending', 'Ожидает оплаты'), ('paid', 'Оплачен'), ('packing', 'В сборке'), ('delivering', 'Доставляется'), ('completed', 'Выполнен')], max_length=20)),
+                        ('subtotal', models.DecimalField(decimal_places=2, max_digits=12)),
+                        ('total', models.DecimalField(decimal_places=2, max_digits=12)),
+                        ('item_count', models.PositiveIntegerField()),
+                        ('archived', models.DateTimeField(auto_now_add=True)),
+                        ('user', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='archived_orders', to=settings.AUTH_USER_MODEL)),
+                    ],
+                    options={
+                        'verbose_name': 'Архивный заказ',
+                        'verbose_name_plural': 'Архивные заказы',
+                        'ordering': ['-created'],
+                    },
+                ),
+                migrations.CreateModel(
+                    name='ArchivedOrderItem',
+                    fields=[
+                        ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                        ('order_id', models.BigIntegerField(db_index=True)),
+                        ('order_created', models.DateTimeField()),
+                        ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                        ('quantity', models.PositiveIntegerField()),
+                        ('product', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='goods.product')),
+                    ],
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(create_archive_tables,
+                                     drop_archive_tables),
+            ],
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_existing_orders_confirmed(apps, schema_editor):
+    # Письма по уже оформленным заказам отправлены прежней задачей
+    Order = apps.get_model("orders", "Order")
+    Order.objects.update(confirmation_sent=models.F("created"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_archived_orders'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='confirmation_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='confirmation_sent',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Письмо о заказе отправлено'),
+        ),
+        migrations.RunPython(mark_existing_orders_confirmed,
+                             migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('confirmation_sent__isnull', True)), fields=['id'], name='orders_pending_confirm_idx'),
+        ),
+    ]
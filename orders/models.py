@@ -1,6 +1,7 @@
 import uuid
 
 from django.db import models
+from django.db.models import F, Sum
 from django.conf import settings
 
 from goods.models import Product
@@ -13,6 +14,15 @@ class Order(models.Model):
         PACKING = "packing", "В сборке"
         DELIVERING = "delivering", "Доставляется"
         COMPLETED = "completed", "Выполнен"
+
+    # Допустимые переходы: целевой статус -> статус, из которого в него переходят
+    STATUS_FLOW = {
+        OrderStatus.PAID: OrderStatus.PENDING,
+        OrderStatus.PACKING: OrderStatus.PAID,
+        OrderStatus.DELIVERING: OrderStatus.PACKING,
+        OrderStatus.COMPLETED: OrderStatus.DELIVERING,
+    }
+
     order_uuid = models.UUIDField(default=uuid.uuid4, unique=True)
     user = models.ForeignKey(settings.AUTH_USER_MODEL,
                              on_delete=models.CASCADE,
@@ -34,11 +44,30 @@ class Order(models.Model):
         default=OrderStatus.PENDING,
         verbose_name="Статус заказа"
     )
+    subtotal = models.DecimalField(max_digits=12, decimal_places=2,
+                                   default=0, verbose_name="Сумма товаров")
+    total = models.DecimalField(max_digits=12, decimal_places=2,
+                                default=0, verbose_name="Итого")
+    item_count = models.PositiveIntegerField(default=0,
+                                             verbose_name="Количество товаров")
+    confirmation_sent = models.DateTimeField(
+        null=True, blank=True,
+        verbose_name="Письмо о заказе отправлено"
+    )
+    confirmation_attempts = models.PositiveSmallIntegerField(default=0)
+    # Когда воркер забрал заказ на отправку письма (см. orders.tasks)
+    confirmation_claimed = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ["-created"]
         indexes = [
-            models.Index(fields=["-created"])
+            models.Index(fields=["-created"]),
+            models.Index(fields=["user", "-created", "-id"],
+                         name="orders_user_created_id_idx"),
+            # Небольшой индекс только по заказам, ждущим письма
+            models.Index(fields=["id"],
+                         condition=models.Q(confirmation_sent__isnull=True),
+                         name="orders_pending_confirm_idx"),
         ]
         verbose_name = "Заказ"
         verbose_name_plural = "Заказы"
@@ -48,7 +77,25 @@ class Order(models.Model):
     
     @property
     def total_cost(self):
-        return sum(item.cost for item in self.items.all())
+        return self.total
+
+    def set_totals(self, items):
+        """Заполняет итоги по уже загруженным позициям, без запросов"""
+        self.subtotal = sum((item.cost for item in items), 0)
+        self.total = self.subtotal
+        self.item_count = sum(item.quantity for item in items)
+
+    def update_totals(self):
+        """Пересчитывает итоги одним агрегирующим запросом"""
+        totals = self.items.aggregate(
+            subtotal=Sum(F("price") * F("quantity"),
+                         output_field=models.DecimalField()),
+            item_count=Sum("quantity")
+        )
+        self.subtotal = totals["subtotal"] or 0
+        self.total = self.subtotal
+        self.item_count = totals["item_count"] or 0
+        self.save(update_fields=["subtotal", "total", "item_count", "updated"])
 
 
 class OrderItem(models.Model):
@@ -68,3 +115,96 @@ class OrderItem(models.Model):
     @property
     def cost(self):
         return self.price * self.quantity
+
+
+class OutboxEvent(models.Model):
+    """
+    Событие по заказу, записанное в той же транзакции, что и сам заказ.
+    В Celery события публикует orders.outbox, а не код оформления заказа.
+    """
+    class EventType(models.TextChoices):
+        ORDER_CREATED = "order.created", "Заказ оформлен"
+        ORDER_STATUS_CHANGED = "order.status_changed", "Статус заказа изменён"
+
+    event_type = models.CharField(max_length=50, choices=EventType.choices)
+    payload = models.JSONField(default=dict)
+    created = models.DateTimeField(auto_now_add=True)
+    published = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Публикаторы, уже успешно обработавшие событие: при повторе
+    # публикации они не вызываются снова
+    delivered_to = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["id"],
+                         condition=models.Q(published__isnull=True),
+                         name="orders_outbox_pending_idx"),
+        ]
+        verbose_name = "Событие заказа"
+        verbose_name_plural = "События заказов"
+
+    def __str__(self):
+        return f"{self.event_type}: {self.id}"
+
+
+class ArchivedOrder(models.Model):
+    """
+    Выполненный заказ, перенесённый из orders_order архивацией
+    (orders.archive). В PostgreSQL таблица секционирована по месяцам
+    created, первичный ключ — (id, created).
+    """
+    id = models.BigIntegerField(primary_key=True)
+    order_uuid = models.UUIDField()
+    user = models.ForeignKey(settings.AUTH_USER_MODEL,
+                             on_delete=models.DO_NOTHING,
+                             db_constraint=False,
+                             related_name="archived_orders",
+                             null=True, blank=True)
+    first_name = models.CharField(max_length=50)
+    last_name = models.CharField(max_length=50)
+    email = models.EmailField()
+    address = models.TextField()
+    city = models.CharField(max_length=100)
+    created = models.DateTimeField()
+    updated = models.DateTimeField()
+    paid = models.BooleanField(default=False)
+    status = models.CharField(max_length=20,
+                              choices=Order.OrderStatus.choices)
+    subtotal = models.DecimalField(max_digits=12, decimal_places=2)
+    total = models.DecimalField(max_digits=12, decimal_places=2)
+    item_count = models.PositiveIntegerField()
+    archived = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created"]
+        verbose_name = "Архивный заказ"
+        verbose_name_plural = "Архивные заказы"
+
+    def __str__(self):
+        return f"Archived order: {self.id}"
+
+    @property
+    def total_cost(self):
+        return self.total
+
+
+class ArchivedOrderItem(models.Model):
+    """Позиция архивного заказа; секционируется по created заказа"""
+    id = models.BigIntegerField(primary_key=True)
+    order_id = models.BigIntegerField(db_index=True)
+    order_created = models.DateTimeField()
+    product = models.ForeignKey(Product,
+                                on_delete=models.DO_NOTHING,
+                                db_constraint=False,
+                                related_name="+")
+    price = models.DecimalField(max_digits=10,
+                                decimal_places=2)
+    quantity = models.PositiveIntegerField()
+
+    def __str__(self):
+        return str(self.id)
+
+    @property
+    def cost(self):
+        return self.price * self.quantity
@@ -0,0 +1,137 @@
+import logging
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from kombu.exceptions import KombuError
+
+from .models import OutboxEvent
+from .tasks import send_order_confirmations, send_order_status_emails
+
+
+logger = logging.getLogger(__name__)
+
+
+def _publish_orders_created(events):
+    # Письма о новых заказах берутся из заказов с confirmation_sent IS NULL,
+    # поэтому на всю пачку событий достаточно одной задачи
+    send_order_confirmations.delay()
+
+
+def _publish_status_changed(events):
+    order_ids = sorted({order_id for event in events
+                        for order_id in event.payload["order_ids"]})
+    send_order_status_emails.delay(order_ids)
+
+
+PUBLISHERS = {
+    OutboxEvent.EventType.ORDER_CREATED: [_publish_orders_created],
+    OutboxEvent.EventType.ORDER_STATUS_CHANGED: [_publish_status_changed],
+}
+
+
+def publisher_name(publisher):
+    return f"{publisher.__module__}.{publisher.__qualname__}"
+
+
+def subscribe(event_type):
+    """
+    Регистрирует дополнительный публикатор для типа события. Публикатор
+    получает пачку событий одного типа и ставит по ней задачи в Celery.
+    """
+    def decorator(publisher):
+        PUBLISHERS[event_type].append(publisher)
+        return publisher
+    return decorator
+
+
+def publish_pending_events(batch_size=None):
+    """
+    Публикует пачку неопубликованных событий в Celery: одна задача на
+    тип события и публикатора. Успех записывается по каждому публикатору,
+    поэтому при повторе вызываются только те, что упали, и, например,
+    письма не уходят дважды. Событие считается опубликованным, когда его
+    обработали все публикаторы. Возвращает число опубликованных.
+    """
+    if batch_size is None:
+        batch_size = settings.OUTBOX_BATCH_SIZE
+
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True)
+            .filter(published__isnull=True,
+                    attempts__lt=settings.OUTBOX_MAX_ATTEMPTS)
+            .order_by("id")[:batch_size]
+        )
+
+        by_type = {}
+        for event in events:
+            by_type.setdefault(event.event_type, []).append(event)
+
+        for event_type, typed_events in by_type.items():
+            for publisher in PUBLISHERS[event_type]:
+                name = publisher_name(publisher)
+                pending = [event for event in typed_events
+                           if name not in event.delivered_to]
+                if not pending:
+                    continue
+                try:
+                    publisher(pending)
+                except (KombuError, OSError):
+                    logger.exception("Не удалось опубликовать события %s через %s",
+                                     event_type, name)
+                else:
+                    for event in pending:
+                        event.delivered_to.append(name)
+
+        now = timezone.now()
+        published = []
+        for event in events:
+            names = {publisher_name(publisher)
+                     for publisher in PUBLISHERS[event.event_type]}
+            if names.issubset(event.delivered_to):
+                event.published = now
+                published.append(event)
+            else:
+                event.attempts += 1
+        if events:
+            OutboxEvent.objects.bulk_update(
+                events, ["delivered_to", "published", "attempts"]
+            )
+    return len(published)
+
+
+def relay_events(batch_size=None):
+    """Публикует события, пока outbox не опустеет"""
+    if batch_size is None:
+        batch_size = settings.OUTBOX_BATCH_SIZE
+
+    total = 0
+    while True:
+        published = publish_pending_events(batch_size)
+        total += published
+        if published < batch_size:
+            return total
+
+
+def prune_published_events(older_than_days=None, batch_size=None):
+    """
+    Удаляет события, опубликованные больше older_than_days дней назад,
+    пачками по batch_size. Возвращает число удалённых событий.
+    """
+    if older_than_days is None:
+        older_than_days = settings.OUTBOX_RETENTION_DAYS
+    if batch_size is None:
+        batch_size = settings.OUTBOX_BATCH_SIZE
+
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    deleted = 0
+    while True:
+        ids = list(OutboxEvent.objects.filter(published__lt=cutoff)
+                   .values_list("id", flat=True)[:batch_size])
+        if ids:
+            deleted += OutboxEvent.objects.filter(id__in=ids).delete()[0]
+        if len(ids) < batch_size:
+            return deleted
@@ -0,0 +1,36 @@
+from core.pagination import SignedCursorPagination
+
+
+class OrdersCursorPagination(SignedCursorPagination):
+    """
+    История заказов: keyset-пагинация от новых заказов к старым.
+    Если у представления есть get_archived_queryset, страница собирается
+    из обеих таблиц: из каждой берётся по limit + 1 записей после курсора,
+    и они сливаются в общем порядке.
+    """
+    default_limit = 10
+    max_limit = 50
+    orderings = {
+        "-created": ("-created", "-id"),
+    }
+    default_ordering = "-created"
+    salt = "orders.pagination.cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        get_archived_queryset = getattr(view, "get_archived_queryset", None)
+        self.archived_queryset = (get_archived_queryset()
+                                  if get_archived_queryset else None)
+        return super().paginate_queryset(queryset, request, view)
+
+    def fetch_page(self, queryset, fields, position):
+        results = super().fetch_page(queryset, fields, position)
+        if self.archived_queryset is None:
+            return results
+
+        results += super().fetch_page(self.archived_queryset, fields, position)
+        results.sort(
+            key=lambda order: tuple(getattr(order, field.lstrip("-"))
+                                    for field in fields),
+            reverse=fields[0].startswith("-"),
+        )
+        return results[:self.limit + 1]
@@ -0,0 +1,47 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import connection
+
+
+# Секционированная таблица -> столбец, по которому она секционирована
+ARCHIVE_TABLES = {
+    "orders_archivedorder": "created",
+    "orders_archivedorderitem": "order_created",
+}
+
+
+def month_start(value):
+    value = value.astimezone(dt_timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def next_month(month):
+    if month.month == 12:
+        return month.replace(year=month.year + 1, month=1)
+    return month.replace(month=month.month + 1)
+
+
+def partition_name(table, month):
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+
+def ensure_archive_partitions(months):
+    """
+    Создаёт месячные секции архивных таблиц, если их ещё нет.
+    На других СУБД архив — обычные таблицы, и функция ничего не делает.
+    """
+    if connection.vendor != "postgresql":
+        return
+
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        for month in sorted({month_start(month) for month in months}):
+            for table in ARCHIVE_TABLES:
+                # Границы вычисляются здесь же, пользовательского ввода в DDL нет
+                cursor.execute(
+                    f"CREATE TABLE IF NOT EXISTS "
+                    f"{quote(partition_name(table, month))} "
+                    f"PARTITION OF {quote(table)} "
+                    f"FOR VALUES FROM ('{month.isoformat()}') "
+                    f"TO ('{next_month(month).isoformat()}')"
+                )
@@ -2,7 +2,7 @@ from rest_framework import serializers
 
 from .models import Order, OrderItem
 from goods.serializers import ProductSerializer
-from .tasks import send_order_email
+from .services import place_order
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -22,10 +22,50 @@ class ListRetrieveOrderSerializer(serializers.ModelSerializer):
                   "last_name", "email", "address",
                   "city", "created", "updated",
                   "paid", "status", "total_cost",
-                  "items",]
+                  "item_count", "items",]
+
+
+class OrderSummarySerializer(serializers.ModelSerializer):
+    """Заказ без позиций — для истории заказов в режиме summary"""
+    class Meta:
+        model = Order
+        fields = ["id", "order_uuid", "created", "updated",
+                  "paid", "status", "total_cost", "item_count"]
+
+
+class OrderStatusTransitionSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=10000
+    )
+    status = serializers.ChoiceField(
+        choices=[(status, Order.OrderStatus(status).label)
+                 for status in Order.STATUS_FLOW]
+    )
+
+
+class OrderExportQuerySerializer(serializers.Serializer):
+    output = serializers.ChoiceField(choices=["csv", "ndjson"], default="csv")
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    status = serializers.ChoiceField(choices=Order.OrderStatus.choices,
+                                     required=False)
+
+    def validate(self, data):
+        if ("date_from" in data and "date_to" in data
+                and data["date_from"] > data["date_to"]):
+            raise serializers.ValidationError(
+                {"date_from": "Начало периода позже его конца"}
+            )
+        return data
 
 
 class CreateOrderSerializer(serializers.ModelSerializer):
+    # Оформить заказ по новым ценам, не получая 409 из-за их изменения
+    accept_price_changes = serializers.BooleanField(default=False,
+                                                    write_only=True)
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         
@@ -42,36 +82,14 @@ class CreateOrderSerializer(serializers.ModelSerializer):
             data["last_name"] = data.get("last_name", user.last_name)
             data["email"] = data.get("email", user.email)
 
-        if len(self.context["cart_items"]) == 0:
-            raise serializers.ValidationError(
-                {"error": "Ваша корзина пуста, вы не можете оформить заказ"}
-                )
         return data
     
     def create(self, validated_data):
-        user = self.context["request"].user
-    
-        new_order = Order.objects.create(
-            user=user if user.is_authenticated else None,
-            **validated_data
-            )
-    
-        order_items = [OrderItem(order=new_order,
-                                 product=item.product,
-                                 price=item.product.price,
-                                 quantity=item.quantity)
-                       for item in self.context["cart_items"]]
-        OrderItem.objects.bulk_create(order_items)
-
-        return new_order
-    
-    def save(self):
-        self.instance = self.create(self.validated_data)
-        send_order_email.delay(self.instance.id,
-                               self.context["request"].user.email)
-        return self.instance
+        accept_price_changes = validated_data.pop("accept_price_changes")
+        return place_order(self.context["request"], validated_data,
+                           accept_price_changes=accept_price_changes)
 
     class Meta:
         model = Order
         fields = ["first_name", "last_name", "email",
-                  "address", "city"]
\ No newline at end of file
+                  "address", "city", "accept_price_changes"]
\ No newline at end of file
@@ -1,18 +1,230 @@
-from rest_framework.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.status import HTTP_409_CONFLICT
 
-from cart.models import Cart
+from cart.models import Cart, CartItem
+from cart.services import uses_redis_storage, materialize_guest_cart, clear_cart
+from cart.storage import RedisCartStorage
+from .models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem, OutboxEvent
 
 
-def get_cart(request):
+class CartChanged(APIException):
+    status_code = HTTP_409_CONFLICT
+    default_detail = "Корзина изменилась, подтвердите заказ ещё раз"
+    default_code = "cart_changed"
+
+    def __init__(self, changes):
+        super().__init__()
+        # Без приведения к ErrorDetail: id и цены отдаются клиенту как есть
+        self.detail = {"error": self.detail, **changes}
+
+
+def check_cart_items(cart_items, accept_price_changes=False):
+    """
+    Сверяет позиции корзины с уже загруженными товарами за один проход:
+    недоступные товары убираются, изменившиеся цены обновляются в позициях.
+    Возвращает компактный diff или None, если заказ можно оформлять.
+    """
+    removed, repriced = [], []
+    for item in cart_items:
+        product = item.product
+        if not product.available:
+            removed.append({"product_id": product.pk, "name": product.name})
+        elif item.price is not None and item.price != product.price:
+            repriced.append({"product_id": product.pk, "name": product.name,
+                             "old_price": str(item.price),
+                             "new_price": str(product.price)})
+
+    if not removed and (not repriced or accept_price_changes):
+        return None
+    return {"removed": removed, "repriced": repriced}
+
+
+def _apply_cart_changes(cart_items, changes):
+    """Удаляет недоступные позиции и сохраняет новые цены (два запроса)"""
+    removed_ids = {line["product_id"] for line in changes["removed"]}
+    repriced_ids = {line["product_id"] for line in changes["repriced"]}
+
+    if removed_ids:
+        CartItem.objects.filter(
+            id__in=[item.id for item in cart_items
+                    if item.product_id in removed_ids]
+        ).delete()
+
+    repriced_items = [item for item in cart_items
+                      if item.product_id in repriced_ids]
+    for item in repriced_items:
+        item.price = item.product.price
+    if repriced_items:
+        CartItem.objects.bulk_update(repriced_items, ["price"])
+
+
+def get_order_queryset():
+    """
+    Заказы с позициями, товарами и категориями: страница истории
+    загружается фиксированным числом запросов
+    """
+    return Order.objects.prefetch_related(
+        Prefetch(
+            "items",
+            queryset=OrderItem.objects.select_related("product__category")
+                                      .order_by("id"),
+        )
+    )
+
+
+def attach_archived_items(orders):
+    """
+    Подгружает позиции архивных заказов одним запросом и кладёт их в
+    order.items, чтобы архивные заказы сериализовались как обычные
+    """
+    archived = [order for order in orders if isinstance(order, ArchivedOrder)]
+    if not archived:
+        return orders
+
+    items = {order.id: [] for order in archived}
+    for item in (ArchivedOrderItem.objects
+                 # order_created отсекает лишние секции архива
+                 .filter(order_id__in=list(items),
+                         order_created__in=[order.created for order in archived])
+                 .select_related("product__category")
+                 .order_by("id")):
+        items[item.order_id].append(item)
+    for order in archived:
+        order.items = items[order.id]
+    return orders
+
+
+def get_cart(request, lock=False):
     user = request.user
+    carts = Cart.objects.select_for_update() if lock else Cart.objects
     
     if user.is_authenticated:
-        return Cart.objects.get(user=user)
+        return carts.get(user=user)
 
     else:
         cart_id = request.COOKIES.get("cart_id")
         if cart_id is not None:
-            return Cart.objects.get(pk=cart_id)
+            if uses_redis_storage(user):
+                cart_id = materialize_guest_cart(cart_id).pk
+            return carts.get(pk=cart_id)
         else:
-            raise ValidationError()
-        
+            raise ValidationError(
+                {"error": "Отсутствует идентификатор корзины в cookies"}
+            )
+
+
+def place_order(request, order_data, accept_price_changes=False):
+    """
+    Оформляет заказ из корзины в одной транзакции. Число запросов не
+    зависит от количества позиций: блокировка корзины, позиции вместе
+    с товарами, INSERT заказа, один INSERT всех позиций и очистка корзины.
+    Цены и доступность товаров проверяются по той же выборке позиций;
+    если корзина изменилась, она исправляется и возвращается 409 с diff.
+    Письмо отправляется по событию в outbox, записанному в той же
+    транзакции, поэтому оформление заказа не обращается к брокеру.
+    """
+    with transaction.atomic():
+        cart = get_cart(request, lock=True)
+        cart_items = list(
+            CartItem.objects.filter(cart=cart).select_related("product")
+        )
+        if not cart_items:
+            raise ValidationError(
+                {"error": "Ваша корзина пуста, вы не можете оформить заказ"}
+            )
+
+        changes = check_cart_items(cart_items, accept_price_changes)
+        if changes is None:
+            order = _create_order(request, order_data, cart, cart_items)
+        else:
+            _apply_cart_changes(cart_items, changes)
+
+    # Исправления корзины фиксируются, поэтому исключение — вне транзакции
+    if changes is not None:
+        if uses_redis_storage(request.user):
+            # Гостевая корзина переносится из Redis заново при каждой
+            # попытке, поэтому исправления записываются и в Redis
+            storage = RedisCartStorage()
+            storage.remove_items(
+                cart.pk, [line["product_id"] for line in changes["removed"]]
+            )
+            storage.set_prices(cart.pk, {line["product_id"]: line["new_price"]
+                                         for line in changes["repriced"]})
+        raise CartChanged(changes)
+    return order
+
+
+def _create_order(request, order_data, cart, cart_items):
+    user = request.user
+
+    order = Order(user=user if user.is_authenticated else None,
+                  **order_data)
+    order_items = [
+        OrderItem(order=order,
+                  product=item.product,
+                  price=item.product.price,
+                  quantity=item.quantity)
+        for item in cart_items
+    ]
+    # Итоги сохраняются тем же INSERT, что и сам заказ
+    order.set_totals(order_items)
+    order.save()
+    OrderItem.objects.bulk_create(order_items)
+
+    clear_cart(cart, is_authenticated=user.is_authenticated)
+    OutboxEvent.objects.create(
+        event_type=OutboxEvent.EventType.ORDER_CREATED,
+        payload={"order_id": order.id}
+    )
+
+    return order
+
+
+def transition_orders(order_ids, status):
+    """
+    Переводит заказы в статус status одним
+    UPDATE ... WHERE status = <предыдущий статус> RETURNING id.
+    Заказы не в том статусе пропускаются. Уведомления уходят через
+    одно событие в outbox. Возвращает (updated, skipped).
+    """
+    try:
+        expected = Order.STATUS_FLOW[status]
+    except KeyError:
+        raise ValidationError(
+            {"status": f"В статус «{status}» нельзя перевести заказ"}
+        )
+
+    order_ids = sorted(set(order_ids))
+    if not order_ids:
+        return [], []
+
+    table = connection.ops.quote_name(Order._meta.db_table)
+    assignments = ["status = %s", "updated = %s"]
+    params = [status, connection.ops.adapt_datetimefield_value(timezone.now())]
+    if status == Order.OrderStatus.PAID:
+        assignments.append("paid = %s")
+        params.append(True)
+    params += [order_ids, expected]
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET {', '.join(assignments)} "
+                f"WHERE id = ANY(%s) AND status = %s "
+                f"RETURNING id",
+                params
+            )
+            updated = sorted(row[0] for row in cursor.fetchall())
+
+        if updated:
+            OutboxEvent.objects.create(
+                event_type=OutboxEvent.EventType.ORDER_STATUS_CHANGED,
+                payload={"order_ids": updated, "status": status}
+            )
+
+    updated_set = set(updated)
+    skipped = [order_id for order_id in order_ids if order_id not in updated_set]
+    return updated, skipped
@@ -1,25 +1,122 @@
-from core.celery import app
-from django.template.loader import render_to_string
-from django.core.mail import send_mail
+import smtplib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
 
+from core.celery import app
+from .archive import archive_completed_orders
+from .emails import build_order_email, deliver_messages
 from .models import Order
 
 
 @app.task
 def send_order_email(order_id, user_email):
-    order = Order.objects.get(id=order_id)
-    
-    subject = "Подтверждение заказа"
-    html_message = render_to_string(
-            "order_email.html",
-            {"order": order}
+    """
+    Устаревшая задача: оставлена на один релиз для сообщений, поставленных
+    в очередь до перехода на send_order_confirmations
+    """
+    send_order_confirmations.delay()
+
+
+@app.task(bind=True, max_retries=5, default_retry_delay=60)
+def send_order_confirmations(self):
+    """
+    Разбирает заказы, ожидающие письма, пачками по ORDER_EMAIL_BATCH_SIZE.
+    Пачка сначала забирается короткой транзакцией, письма отправляются
+    уже без блокировок строк через одно SMTP-соединение, затем
+    отправленные заказы отмечаются. Неотправленные письма повторяются
+    при retry, отправленные повторно не уходят.
+    """
+    batch_size = settings.ORDER_EMAIL_BATCH_SIZE
+    sent = 0
+    while True:
+        orders = _claim_confirmation_batch(batch_size)
+        if not orders:
+            return sent
+
+        try:
+            failed = set(deliver_messages([
+                build_order_email(order, "Подтверждение заказа", "order_email.html")
+                for order in orders
+            ]))
+        except (smtplib.SMTPException, OSError) as exc:
+            _release_claims([order.id for order in orders])
+            raise self.retry(exc=exc)
+
+        sent_ids = [order.id for index, order in enumerate(orders)
+                    if index not in failed]
+        Order.objects.filter(id__in=sent_ids).update(
+            confirmation_sent=timezone.now(), confirmation_claimed=None
         )
-    
-    send_mail(
-        subject=subject,
-        message="",
-        from_email=None,
-        recipient_list=[user_email],
-        fail_silently=False,
-        html_message=html_message
-    )
\ No newline at end of file
+        sent += len(sent_ids)
+
+        if failed:
+            _release_claims([orders[index].id for index in failed])
+            raise self.retry()
+        if len(orders) < batch_size:
+            return sent
+
+
+def _claim_confirmation_batch(batch_size):
+    """
+    Забирает пачку заказов, ожидающих письма, и фиксирует это сразу.
+    Заказ, забранный упавшим воркером, снова доступен через
+    ORDER_EMAIL_CLAIM_TIMEOUT секунд.
+    """
+    now = timezone.now()
+    stale_claim = now - timedelta(seconds=settings.ORDER_EMAIL_CLAIM_TIMEOUT)
+    with transaction.atomic():
+        orders = list(
+            Order.objects.select_for_update(skip_locked=True)
+            .filter(Q(confirmation_claimed__isnull=True)
+                    | Q(confirmation_claimed__lt=stale_claim),
+                    confirmation_sent__isnull=True,
+                    confirmation_attempts__lt=settings.ORDER_EMAIL_MAX_ATTEMPTS)
+            .exclude(email="")
+            .order_by("id")[:batch_size]
+        )
+        Order.objects.filter(id__in=[order.id for order in orders]).update(
+            confirmation_claimed=now,
+            confirmation_attempts=F("confirmation_attempts") + 1
+        )
+    return orders
+
+
+def _release_claims(order_ids):
+    Order.objects.filter(id__in=order_ids).update(confirmation_claimed=None)
+
+
+@app.task
+def send_order_status_emails(order_ids):
+    """Письма о смене статуса для пачки заказов через одно SMTP-соединение"""
+    orders = Order.objects.filter(id__in=order_ids).exclude(email="")
+
+    messages = [
+        build_order_email(order,
+                          f"Заказ № {order.id}: {order.get_status_display()}",
+                          "order_status_email.html")
+        for order in orders
+    ]
+    if not messages:
+        return 0
+    return len(messages) - len(deliver_messages(messages))
+
+
+@app.task
+def archive_completed_orders_task():
+    return archive_completed_orders()
+
+
+@app.task
+def relay_outbox_events():
+    from .outbox import relay_events
+    return relay_events()
+
+
+@app.task
+def prune_outbox_events():
+    from .outbox import prune_published_events
+    return prune_published_events()
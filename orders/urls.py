@@ -6,7 +6,11 @@ from . import views
 app_name = "orders"
 
 urlpatterns = [
-    path("", views.ListCreateOrderAPIView.as_view()),
-    path("<uuid:pk>/", views.RetrieveOrderAPIView.as_view(),
+    path("", views.ListCreateOrderAPIView.as_view(), name="list_create_orders"),
+    path("status/", views.OrderStatusTransitionAPIView.as_view(),
+         name="bulk_order_status"),
+    path("export/", views.OrderExportAPIView.as_view(),
+         name="export_orders"),
+    path("<int:pk>/", views.RetrieveOrderAPIView.as_view(),
          name="retrieve_order"),
 ]
\ No newline at end of file
@@ -1,20 +1,42 @@
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from rest_framework import generics
-from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 
+from cart.mixins import MergeGuestCartMixin
 from cart.permission import IsCartOwner
-from .models import Order, OrderItem
+from .export import iter_export_orders, stream_csv, stream_ndjson
+from .idempotency import IdempotentCreateMixin
+from .models import ArchivedOrder, Order
+from .pagination import OrdersCursorPagination
+from .services import attach_archived_items, get_order_queryset, transition_orders
 from . import serializers
-from .services import get_cart
-from cart.models import Cart, CartItem
-from cart.services import clear_cart
+from cart.models import Cart
 
 
-class ListCreateOrderAPIView(generics.ListCreateAPIView):
+class ListCreateOrderAPIView(IdempotentCreateMixin, MergeGuestCartMixin,
+                             generics.ListCreateAPIView):
+    pagination_class = OrdersCursorPagination
+
+    def is_summary(self):
+        return self.request.query_params.get("view") == "summary"
+
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user)
+        if self.is_summary():
+            return Order.objects.filter(user=self.request.user)
+        return get_order_queryset().filter(user=self.request.user)
+
+    def get_archived_queryset(self):
+        # Выполненные заказы, перенесённые в архив, остаются в истории
+        return ArchivedOrder.objects.filter(user=self.request.user)
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None and not self.is_summary():
+            attach_archived_items(page)
+        return page
     
     def get_permissions(self):
         if self.request.method == "GET":
@@ -23,34 +45,23 @@ class ListCreateOrderAPIView(generics.ListCreateAPIView):
 
     def get_serializer_class(self):
         if self.request.method == "GET":
+            if self.is_summary():
+                return serializers.OrderSummarySerializer
             return serializers.ListRetrieveOrderSerializer
         return serializers.CreateOrderSerializer
 
     def create(self, request, *args, **kwargs):
+        serializer = serializers.CreateOrderSerializer(data=request.data,
+                                                       context={"request": request})
+        serializer.is_valid(raise_exception=True)
+
         try:
-            user_cart = get_cart(request)
+            serializer.save()
         except Cart.DoesNotExist:
             return Response(
                 {"error": "Корзина не найдена"},
                 status=status.HTTP_404_NOT_FOUND
                 )
-        except ValidationError:
-            return Response(
-                {"error": "Отсутствует идентификатор корзины в cookies"},
-                status=status.HTTP_400_BAD_REQUEST
-                )
-        
-        cart_items = CartItem.objects.filter(cart=user_cart)
-        context = {"cart_items": cart_items,
-                   "request": request}
-        serializer = serializers.CreateOrderSerializer(data=request.data,
-                                                       context=context)
-
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
-        
-        clear_cart(user_cart,
-                    is_authenticated=request.user.is_authenticated)
 
         return Response({"detail": "Заказ успешно оформлен. "
                         "Детали заказа высланы на вашу электронную почту"},
@@ -62,7 +73,62 @@ class RetrieveOrderAPIView(generics.RetrieveAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user)
+        return get_order_queryset().filter(user=self.request.user)
 
+    def get_object(self):
+        try:
+            return super().get_object()
+        except Http404:
+            order = get_object_or_404(ArchivedOrder, user=self.request.user,
+                                      pk=self.kwargs["pk"])
+            return attach_archived_items([order])[0]
 
-        
+
+class OrderStatusTransitionAPIView(generics.GenericAPIView):
+    """Массовая смена статуса заказов для склада"""
+    serializer_class = serializers.OrderStatusTransitionSerializer
+    permission_classes = [IsAdminUser]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        updated, skipped = transition_orders(serializer.validated_data["ids"],
+                                             serializer.validated_data["status"])
+        return Response({"status": serializer.validated_data["status"],
+                         "updated": updated,
+                         "skipped": skipped},
+                        status=status.HTTP_200_OK)
+
+
+class OrderExportAPIView(generics.GenericAPIView):
+    """
+    Потоковая выгрузка заказов с позициями в CSV или NDJSON для бухгалтерии.
+    Память не зависит от размера периода: заказы читаются пачками.
+    """
+    serializer_class = serializers.OrderExportQuerySerializer
+    permission_classes = [IsAdminUser]
+    streams = {
+        "csv": (stream_csv, "text/csv; charset=utf-8"),
+        "ndjson": (stream_ndjson, "application/x-ndjson; charset=utf-8"),
+    }
+
+    def get(self, request, *args, **kwargs):
+        query = self.get_serializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        orders = iter_export_orders(date_from=params.get("date_from"),
+                                    date_to=params.get("date_to"),
+                                    status=params.get("status"))
+        stream, content_type = self.streams[params["output"]]
+
+        response = StreamingHttpResponse(stream(orders),
+                                         content_type=content_type)
+        period = "_".join(str(params[field])
+                          for field in ("date_from", "date_to") if field in params)
+        filename = f"orders_{period}" if period else "orders"
+        response["Content-Disposition"] = (
+            f'attachment; filename="{filename}.{params["output"]}"'
+        )
+        return response
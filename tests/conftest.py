@@ -1,9 +1,15 @@
+from datetime import timedelta
+
 import pytest
 from rest_framework.test import APIClient
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from django.utils import timezone
+from model_bakery import baker
 
 from authentication.models import RefreshToken
+from goods.models import Product
+from orders.models import Order, OrderItem
 
 
 User = get_user_model()
@@ -60,3 +66,42 @@ def authorized_api_client(api_client, auth_tokens):
         HTTP_AUTHORIZATION=f"Bearer {auth_tokens['access_token']}"
     )
     return api_client
+
+
+@pytest.fixture
+def staff_client(api_client, test_user):
+    test_user.is_admin = True
+    test_user.save(update_fields=["is_admin"])
+    api_client.force_authenticate(test_user)
+    return api_client
+
+
+@pytest.fixture
+def make_order():
+    """
+    Создает заказ с позициями и итогами. lines — [(товар, количество)];
+    без lines создается items_count позиций по новым товарам ценой 10.
+    age_days сдвигает дату оформления в прошлое.
+    """
+    def make(lines=None, *, items_count=2, status=Order.OrderStatus.PENDING,
+             age_days=0, user=None):
+        if lines is None:
+            products = (baker.make(Product, price=10, _quantity=items_count)
+                        if items_count else [])
+            lines = [(product, 1) for product in products]
+
+        order = baker.prepare(Order, status=status, user=user)
+        items = [OrderItem(order=order, product=product,
+                           price=product.price, quantity=quantity)
+                 for product, quantity in lines]
+        order.set_totals(items)
+        order.save()
+        OrderItem.objects.bulk_create(items)
+
+        if age_days:
+            Order.objects.filter(pk=order.pk).update(
+                created=timezone.now() - timedelta(days=age_days)
+            )
+            order.refresh_from_db()
+        return order
+    return make
@@ -0,0 +1,16 @@
+import pytest
+from model_bakery import baker
+
+from goods.models import Category, Product
+
+
+@pytest.fixture
+def catalog():
+    books, games = baker.make(Category, _quantity=2)
+    return {
+        "books": books,
+        "games": games,
+        "novel": baker.make(Product, category=books, price=10),
+        "poems": baker.make(Product, category=books, price=20),
+        "chess": baker.make(Product, category=games, price=50),
+    }
@@ -0,0 +1,197 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from analytics.models import (
+    AppliedOrderEvent, DailyCategorySales, DailyProductSales, DailySales
+)
+from analytics.services import prune_applied_events, rebuild_sales_rollups
+from analytics.tasks import apply_sales_events, backfill_sales_rollups
+from orders.archive import archive_completed_orders
+from orders.models import Order, OutboxEvent
+from orders.outbox import publish_pending_events
+from orders.services import transition_orders
+
+
+@pytest.mark.django_db
+class TestSalesRollups:
+    def test_rollups_by_product_and_category(self, catalog, make_order):
+        make_order([(catalog["novel"], 2), (catalog["chess"], 1)])
+        make_order([(catalog["novel"], 1), (catalog["poems"], 1)],
+                   status=Order.OrderStatus.PAID)
+        today = timezone.localdate()
+
+        rebuild_sales_rollups([today])
+
+        novel = DailyProductSales.objects.get(date=today, product=catalog["novel"])
+        assert (novel.order_count, novel.quantity) == (2, 3)
+        assert novel.revenue == Decimal("30")
+        assert (novel.paid_quantity, novel.paid_revenue) == (1, Decimal("10"))
+
+        books = DailyCategorySales.objects.get(date=today, category=catalog["books"])
+        assert (books.order_count, books.quantity) == (2, 4)
+        assert books.revenue == Decimal("50")
+
+        day = DailySales.objects.get(date=today)
+        assert (day.order_count, day.revenue) == (2, Decimal("100"))
+        assert day.paid_revenue == Decimal("30")
+
+    def test_rebuild_uses_day_boundaries(self, catalog, make_order):
+        today = timezone.localdate()
+        day_start = timezone.make_aware(datetime.combine(today, time.min))
+        # Последняя секунда позавчера, начало вчера и начало сегодня
+        moments = [day_start - timedelta(days=1, seconds=1),
+                   day_start - timedelta(days=1), day_start]
+        for moment in moments:
+            order = make_order([(catalog["novel"], 1)])
+            Order.objects.filter(pk=order.pk).update(created=moment)
+
+        # Несмежные дни: позавчера и сегодня, вчера не пересчитывается
+        rebuild_sales_rollups([today - timedelta(days=2), today])
+
+        assert dict(DailySales.objects.values_list("date", "order_count")) == {
+            today - timedelta(days=2): 1,
+            today: 1,
+        }
+
+    def test_rebuild_is_idempotent(self, catalog, make_order):
+        make_order([(catalog["novel"], 1)])
+        today = timezone.localdate()
+
+        rebuild_sales_rollups([today])
+        rebuild_sales_rollups([today])
+
+        assert DailyProductSales.objects.get().quantity == 1
+        assert DailySales.objects.get().order_count == 1
+
+    def test_status_change_updates_paid_figures(self, catalog, make_order):
+        order = make_order([(catalog["chess"], 2)])
+        apply_sales_events([created_event(order).id])
+        assert DailySales.objects.get().paid_revenue == 0
+
+        transition_orders([order.id], Order.OrderStatus.PAID)
+        apply_sales_events(list(OutboxEvent.objects.filter(
+            event_type=OutboxEvent.EventType.ORDER_STATUS_CHANGED
+        ).values_list("id", flat=True)))
+
+        assert DailySales.objects.get().paid_revenue == Decimal("100")
+
+    def test_archived_orders_are_kept(self, catalog, make_order):
+        order = make_order([(catalog["novel"], 4)],
+                           status=Order.OrderStatus.COMPLETED)
+
+        archive_completed_orders(older_than_days=-1)
+        assert not Order.objects.filter(pk=order.pk).exists()
+        assert backfill_sales_rollups() == 1
+
+        product = DailyProductSales.objects.get()
+        assert (product.quantity, product.paid_revenue) == (4, Decimal("40"))
+
+    def test_outbox_publishes_sales_events(self, catalog, make_order):
+        event = created_event(make_order([(catalog["novel"], 1)]))
+
+        with patch("orders.outbox.send_order_confirmations.delay"), \
+                patch("analytics.subscribers.apply_sales_events.delay") as mock_apply:
+            publish_pending_events()
+
+        mock_apply.assert_called_once_with([event.id])
+
+
+def created_event(order):
+    return OutboxEvent.objects.create(
+        event_type=OutboxEvent.EventType.ORDER_CREATED,
+        payload={"order_id": order.id}
+    )
+
+
+def paid_event(*orders):
+    return OutboxEvent.objects.create(
+        event_type=OutboxEvent.EventType.ORDER_STATUS_CHANGED,
+        payload={"order_ids": [order.id for order in orders],
+                 "status": Order.OrderStatus.PAID}
+    )
+
+
+def rollup_rows():
+    return {model: sorted(model.objects.values_list(
+                "date", *fields, "order_count", "quantity", "revenue",
+                "paid_quantity", "paid_revenue"))
+            for model, fields in ((DailySales, ()),
+                                  (DailyProductSales, ("product",)),
+                                  (DailyCategorySales, ("category",)))}
+
+
+@pytest.mark.django_db
+class TestSalesEvents:
+    def test_events_are_applied_as_deltas(self, catalog, make_order):
+        first = make_order([(catalog["novel"], 2), (catalog["chess"], 1)])
+        second = make_order([(catalog["novel"], 1), (catalog["poems"], 1)])
+        apply_sales_events([created_event(first).id])
+        Order.objects.filter(pk=second.pk).update(status=Order.OrderStatus.PAID)
+        apply_sales_events([created_event(second).id, paid_event(second).id])
+
+        novel = DailyProductSales.objects.get(product=catalog["novel"])
+        assert (novel.order_count, novel.quantity) == (2, 3)
+        assert (novel.paid_quantity, novel.paid_revenue) == (1, Decimal("10"))
+
+        # Приращения дают то же, что полный пересчет дня
+        rows = rollup_rows()
+        rebuild_sales_rollups([timezone.localdate()])
+        assert rollup_rows() == rows
+
+    def test_paid_event_before_created_event(self, catalog, make_order):
+        order = make_order([(catalog["chess"], 2)], status=Order.OrderStatus.PAID)
+
+        apply_sales_events([paid_event(order).id])
+        apply_sales_events([created_event(order).id])
+
+        day = DailySales.objects.get()
+        assert (day.order_count, day.revenue) == (1, Decimal("100"))
+        assert (day.paid_quantity, day.paid_revenue) == (2, Decimal("100"))
+
+    def test_redelivered_event_is_applied_once(self, catalog, make_order):
+        event = created_event(make_order([(catalog["novel"], 1)]))
+
+        apply_sales_events([event.id])
+        apply_sales_events([event.id])
+
+        assert DailySales.objects.get().order_count == 1
+        assert DailyProductSales.objects.get().quantity == 1
+
+    def test_only_event_orders_are_read(self, catalog, make_order):
+        for _ in range(5):
+            make_order([(catalog["novel"], 1)])
+        event = created_event(make_order([(catalog["chess"], 1)]))
+
+        with CaptureQueriesContext(connection) as context:
+            apply_sales_events([event.id])
+
+        # Событие, отметка о нем, позиции заказа и по INSERT на сводку
+        queries = [query["sql"] for query in context.captured_queries
+                   if "SAVEPOINT" not in query["sql"]]
+        assert len(queries) == 6
+        assert DailySales.objects.get().order_count == 1
+
+    def test_other_statuses_do_not_change_rollups(self, catalog, make_order):
+        order = make_order([(catalog["chess"], 1)])
+        event = OutboxEvent.objects.create(
+            event_type=OutboxEvent.EventType.ORDER_STATUS_CHANGED,
+            payload={"order_ids": [order.id], "status": Order.OrderStatus.PACKING}
+        )
+
+        apply_sales_events([event.id])
+
+        assert not DailySales.objects.exists()
+
+    def test_prune_applied_events(self, catalog, make_order):
+        event = created_event(make_order([(catalog["novel"], 1)]))
+        apply_sales_events([event.id])
+        AppliedOrderEvent.objects.update(applied=timezone.now() - timedelta(days=8))
+
+        assert prune_applied_events(older_than_days=7) == 1
+        assert not AppliedOrderEvent.objects.exists()
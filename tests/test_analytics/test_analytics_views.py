@@ -0,0 +1,64 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from analytics.services import rebuild_sales_rollups
+
+
+@pytest.fixture
+def rollups(catalog, make_order):
+    make_order([(catalog["novel"], 2), (catalog["chess"], 1)])
+    make_order([(catalog["poems"], 1)])
+    rebuild_sales_rollups([timezone.localdate()])
+    return catalog
+
+
+@pytest.mark.django_db
+class TestSalesReportAPI:
+    @property
+    def endpoint(self):
+        return reverse("analytics:sales_report")
+
+    def test_group_by_day(self, staff_client, rollups):
+        response = staff_client.get(self.endpoint)
+
+        assert response.status_code == 200
+        [day] = response.data["results"]
+        assert day["order_count"] == 2
+        assert day["revenue"] == "90.00"
+
+    def test_group_by_product(self, staff_client, rollups):
+        response = staff_client.get(self.endpoint, {"group_by": "product"})
+
+        results = response.data["results"]
+        assert [row["product"] for row in results] == \
+            [rollups["chess"].id, rollups["novel"].id, rollups["poems"].id]
+        assert results[0]["product_name"] == rollups["chess"].name
+        assert results[0]["revenue"] == "50.00"
+
+    def test_group_by_category_with_filter(self, staff_client, rollups):
+        response = staff_client.get(self.endpoint, {
+            "group_by": "category", "category": rollups["books"].id,
+        })
+
+        [row] = response.data["results"]
+        assert row["category"] == rollups["books"].id
+        assert (row["order_count"], row["quantity"]) == (2, 3)
+
+    def test_report_reads_only_rollups(self, staff_client, rollups):
+        with CaptureQueriesContext(connection) as context:
+            staff_client.get(self.endpoint, {"group_by": "product"})
+
+        assert not any("orders_" in query["sql"] for query in context.captured_queries)
+
+    def test_invalid_period(self, staff_client):
+        response = staff_client.get(self.endpoint, {
+            "date_from": "2025-02-01", "date_to": "2025-01-01",
+        })
+        assert response.status_code == 400
+
+    def test_regular_user_is_forbidden(self, authorized_api_client):
+        response = authorized_api_client.get(self.endpoint)
+        assert response.status_code == 403
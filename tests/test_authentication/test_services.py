@@ -1,8 +1,19 @@
-import pytest
+import base64
 import hmac
+import json
+from datetime import timedelta
+
+import pytest
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.urls import reverse
+from django.utils import timezone
 
-from authentication.services.auth_service import AuthService, RefreshTokenExpired
+from authentication.services.auth_service import (
+    AuthService, InvalidAccessToken, RefreshTokenExpired
+)
 from authentication.models import RefreshToken
+from authentication.tasks import delete_stale_refresh_tokens
 
 
 @pytest.mark.django_db
@@ -81,5 +92,171 @@ class TestJWTService:
         assert auth_tokens["refresh_token"].is_revoked
 
 
+def resign(token, header, secret=None):
+    """Подписывает payload токена с другим заголовком (по умолчанию активным ключом)"""
+    if secret is None:
+        secret = settings.JWT_SIGNING_KEYS[settings.JWT_ACTIVE_KID]
+    _, payload_b64, _ = token.split(".")
+    header_b64 = AuthService._base64url_encode(json.dumps(header).encode())
+    signing_input = f"{header_b64}.{payload_b64}".encode()
+    signature = hmac.digest(secret.encode(), signing_input, "sha256")
+    return f"{header_b64}.{payload_b64}.{AuthService._base64url_encode(signature)}"
+
+
+@pytest.mark.django_db
+class TestVerifyAccessToken:
+    def test_valid_token(self, test_user):
+        token = AuthService.create_access_token(test_user)
+
+        payload = AuthService.verify_access_token(token)
+
+        assert payload == AuthService.decode_access_token(token)[2]
+        assert payload["sub"] == test_user.id
+
+    def test_payload_changes_do_not_leak_into_cache(self, test_user):
+        token = AuthService.create_access_token(test_user)
+
+        AuthService.verify_access_token(token)["sub"] = 0
+
+        assert AuthService.verify_access_token(token)["sub"] == test_user.id
+
+    def test_signature_is_checked_before_payload_is_parsed(self, test_user):
+        header_b64, _, signature_b64 = AuthService.create_access_token(test_user).split(".")
+        forged = f"{header_b64}.{AuthService._base64url_encode(b'not json')}.{signature_b64}"
+
+        with pytest.raises(InvalidAccessToken) as exc_info:
+            AuthService.verify_access_token(forged)
+        assert exc_info.value.detail["token"] == "Неверная сигнатура токена"
+
+    @pytest.mark.parametrize("header", [{"alg": "none"}, {"alg": "HS512"}, {}])
+    def test_unsupported_alg(self, test_user, header):
+        token = resign(AuthService.create_access_token(test_user), header)
+
+        with pytest.raises(InvalidAccessToken) as exc_info:
+            AuthService.verify_access_token(token)
+        assert exc_info.value.detail["token"] == "Неподдерживаемый алгоритм подписи"
+
+    @pytest.mark.parametrize("token", [
+        "", "abc", "a.b", "a.b.c.d", "a.b.!!!", "токен.b.c",
+        # kid — список вместо строки
+        "eyJhbGciOiAiSFMyNTYiLCAia2lkIjogWyJvbGQiXX0.e30.AAAA",
+    ])
+    def test_malformed_token(self, token):
+        with pytest.raises(InvalidAccessToken):
+            AuthService.verify_access_token(token)
+
+    def test_trailing_data_after_payload(self, test_user):
+        header_b64 = AuthService.create_access_token(test_user).split(".")[0]
+        payload = json.dumps({"sub": test_user.id, "exp": 2**31}) + " []"
+        signing_input = f"{header_b64}.{AuthService._base64url_encode(payload.encode())}"
+        secret = settings.JWT_SIGNING_KEYS[settings.JWT_ACTIVE_KID]
+        signature = hmac.digest(secret.encode(), signing_input.encode(), "sha256")
+        token = f"{signing_input}.{AuthService._base64url_encode(signature)}"
+
+        with pytest.raises(InvalidAccessToken) as exc_info:
+            AuthService.verify_access_token(token)
+        assert exc_info.value.detail["token"] == "Неверный формат токена"
+
+    def test_malformed_token_is_rejected_by_authentication(self, api_client):
+        api_client.credentials(HTTP_AUTHORIZATION="Bearer not-a-token")
+
+        response = api_client.get(reverse("users:me"))
+
+        assert response.status_code == 403
+
+
+@pytest.mark.django_db
+class TestSigningKeyRotation:
+    @pytest.fixture
+    def keys(self, settings):
+        settings.JWT_SIGNING_KEYS = {"old": "old-secret"}
+        settings.JWT_ACTIVE_KID = "old"
+        return settings
+
+    def test_token_header_contains_active_kid(self, keys, test_user):
+        token = AuthService.create_access_token(test_user)
+
+        header_b64 = token.split(".")[0]
+        header = json.loads(base64.urlsafe_b64decode(header_b64 + "=" * (-len(header_b64) % 4)))
+        assert header == {"alg": "HS256", "typ": "AuthService", "kid": "old"}
+
+    def test_previous_key_still_verifies_after_rotation(self, keys, test_user):
+        old_token = AuthService.create_access_token(test_user)
+
+        keys.JWT_SIGNING_KEYS = {"new": "new-secret", "old": "old-secret"}
+        keys.JWT_ACTIVE_KID = "new"
+        new_token = AuthService.create_access_token(test_user)
+
+        assert AuthService.verify_access_token(old_token)["sub"] == test_user.id
+        assert AuthService.verify_access_token(new_token)["sub"] == test_user.id
+        assert new_token.split(".")[0] != old_token.split(".")[0]
+
+    def test_retired_key_is_rejected(self, keys, test_user):
+        old_token = AuthService.create_access_token(test_user)
+        AuthService.verify_access_token(old_token)
+
+        keys.JWT_SIGNING_KEYS = {"new": "new-secret"}
+        keys.JWT_ACTIVE_KID = "new"
+
+        with pytest.raises(InvalidAccessToken) as exc_info:
+            AuthService.verify_access_token(old_token)
+        assert exc_info.value.detail["token"] == "Неизвестный ключ подписи"
+
+    def test_token_without_kid_uses_legacy_key(self, keys, test_user):
+        keys.JWT_SIGNING_KEYS = {"old": "old-secret", "default": "legacy-secret"}
+        token = resign(AuthService.create_access_token(test_user),
+                       {"alg": "HS256", "typ": "AuthService"}, "legacy-secret")
+
+        assert AuthService.verify_access_token(token)["sub"] == test_user.id
+
+    def test_token_signed_with_other_key_is_rejected(self, keys, test_user):
+        token = resign(AuthService.create_access_token(test_user),
+                       {"alg": "HS256", "kid": "old"}, "new-secret")
+
+        with pytest.raises(InvalidAccessToken) as exc_info:
+            AuthService.verify_access_token(token)
+        assert exc_info.value.detail["token"] == "Неверная сигнатура токена"
+
+    def test_unknown_active_kid(self, keys, test_user):
+        keys.JWT_ACTIVE_KID = "missing"
+
+        with pytest.raises(ImproperlyConfigured):
+            AuthService.create_access_token(test_user)
+
+
+@pytest.mark.django_db
+class TestDeleteStaleRefreshTokens:
+    def make_tokens(self, user, count, expires_in, is_revoked=False):
+        return RefreshToken.objects.bulk_create([
+            RefreshToken(user=user, is_revoked=is_revoked,
+                         expires_at=timezone.now() + expires_in)
+            for _ in range(count)
+        ])
+
+    def test_deletes_revoked_and_expired_tokens(self, test_user):
+        active = self.make_tokens(test_user, 2, timedelta(days=1))
+        self.make_tokens(test_user, 3, timedelta(days=1), is_revoked=True)
+        self.make_tokens(test_user, 4, -timedelta(seconds=1))
+
+        deleted = AuthService.delete_stale_refresh_tokens()
+
+        assert deleted == 7
+        assert set(RefreshToken.objects.values_list("id", flat=True)) == {
+            token.id for token in active
+        }
+
+    def test_deletes_in_batches(self, test_user, django_assert_num_queries):
+        self.make_tokens(test_user, 5, -timedelta(days=1))
+
+        # Три пачки по два токена: выборка id и DELETE на каждую,
+        # последняя неполная пачка завершает цикл
+        with django_assert_num_queries(6):
+            deleted = AuthService.delete_stale_refresh_tokens(batch_size=2)
+
+        assert deleted == 5
+        assert not RefreshToken.objects.exists()
 
+    def test_task(self, test_user):
+        self.make_tokens(test_user, 1, timedelta(days=1), is_revoked=True)
 
+        assert delete_stale_refresh_tokens() == 1
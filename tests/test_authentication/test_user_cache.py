@@ -0,0 +1,105 @@
+import pytest
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from authentication.services.auth_service import AuthService
+from authentication.services.user_cache import CACHED_FIELDS, UserCache
+
+
+@pytest.fixture(autouse=True)
+def clear_local_user_cache():
+    UserCache.clear_local()
+    yield
+    UserCache.clear_local()
+
+
+def user_queries(context):
+    return [query for query in context.captured_queries
+            if "user_account_user" in query["sql"]]
+
+
+@pytest.mark.django_db
+class TestUserCache:
+    def test_cached_user_costs_no_queries(self, test_user):
+        UserCache.get(test_user.pk)
+
+        with CaptureQueriesContext(connection) as context:
+            user = UserCache.get(test_user.pk)
+
+        assert user == test_user
+        assert not context.captured_queries
+
+    def test_redis_tier_is_used_after_local_expiry(self, test_user):
+        UserCache.get(test_user.pk)
+        UserCache.clear_local()
+
+        with CaptureQueriesContext(connection) as context:
+            assert UserCache.get(test_user.pk) == test_user
+
+        assert not context.captured_queries
+
+    def test_returned_user_is_a_copy(self, test_user):
+        UserCache.get(test_user.pk).first_name = "changed"
+
+        assert UserCache.get(test_user.pk).first_name == test_user.first_name
+
+    def test_redis_entry_has_no_password(self, test_user):
+        UserCache.get(test_user.pk)
+
+        entry = caches["default"].get(UserCache._key(test_user.pk))
+
+        assert set(entry) == set(CACHED_FIELDS)
+        assert "password" not in entry
+
+    def test_saving_cached_user_keeps_password(self, test_user):
+        user = UserCache.get(test_user.pk)
+
+        user.first_name = "changed"
+        user.save()
+
+        test_user.refresh_from_db()
+        assert user.phone_number == test_user.phone_number
+        assert test_user.first_name == "changed"
+        assert test_user.check_password("test_password")
+
+    def test_save_invalidates_cache(self, test_user):
+        UserCache.get(test_user.pk)
+
+        test_user.is_active = False
+        test_user.save()
+
+        assert UserCache.get(test_user.pk).is_active is False
+
+    def test_delete_invalidates_cache(self, test_user):
+        user_id = test_user.pk
+        UserCache.get(user_id)
+
+        test_user.delete()
+
+        assert UserCache.get(user_id) is None
+
+
+@pytest.mark.django_db
+class TestJWTAuthenticationUserCache:
+    def test_steady_state_requests_do_not_query_users(self, api_client, test_user):
+        token = AuthService.create_access_token(test_user)
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        api_client.get(reverse("users:me"))
+
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.get(reverse("users:me"))
+
+        assert response.status_code == 200
+        assert not user_queries(context)
+
+    def test_token_issued_before_phone_change_is_rejected(self, api_client, test_user):
+        token = AuthService.create_access_token(test_user)
+        test_user.phone_number = "+79998887766"
+        test_user.save()
+
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        response = api_client.get(reverse("users:me"))
+
+        assert response.status_code == 403
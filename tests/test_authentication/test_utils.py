@@ -1,7 +1,11 @@
+import time
+import uuid
+from unittest.mock import patch
+
 import pytest
 
 from authentication.services.auth_service import AuthService
-from authentication.utils import add_to_blacklist, is_blacklisted
+from authentication.utils import RevocationFilter, add_to_blacklist, is_blacklisted
 
 
 @pytest.mark.django_db
@@ -19,3 +23,38 @@ class TestUtils:
         add_to_blacklist(payload.get("jti"), payload.get("exp"))
 
         assert is_blacklisted(token_jti), "Токен не был успешно добавлен в черный список"
+
+
+class TestRevocationFilter:
+    def test_revocation_from_other_process_is_seen_after_sync(self, settings):
+        settings.JWT_REVOCATION_SYNC_INTERVAL = 60
+        jti = str(uuid.uuid4())
+        local, remote = RevocationFilter(), RevocationFilter()
+
+        assert jti not in local
+        remote.add(jti, time.time() + 60)
+        # До очередной сверки локальная копия не обращается к Redis
+        assert jti not in local
+
+        local.sync()
+        assert jti in local
+
+    def test_not_revoked_check_does_not_touch_redis(self, settings):
+        settings.JWT_REVOCATION_SYNC_INTERVAL = 60
+        revocation_filter = RevocationFilter()
+        revocation_filter.sync()
+
+        with patch("authentication.utils.get_redis_connection") as connection:
+            assert str(uuid.uuid4()) not in revocation_filter
+        connection.assert_not_called()
+
+    def test_expired_tokens_are_not_loaded(self):
+        expired_jti, active_jti = str(uuid.uuid4()), str(uuid.uuid4())
+        RevocationFilter().add(expired_jti, time.time() - 1)
+        RevocationFilter().add(active_jti, time.time() + 60)
+
+        revocation_filter = RevocationFilter()
+        revocation_filter.sync()
+
+        assert active_jti in revocation_filter
+        assert expired_jti not in revocation_filter
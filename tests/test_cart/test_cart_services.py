@@ -4,7 +4,9 @@ from django.contrib.auth.models import AnonymousUser
 from model_bakery import baker
 
 from cart.models import Cart
-from cart.services import get_or_create_cart, add_item_to_cart
+from cart.services import (
+    get_or_create_cart, get_existing_cart, add_item_to_cart, synchronize_carts
+)
 from goods.models import Product
 
 
@@ -31,7 +33,7 @@ class TestGetOrCreateCart:
             self.endpoint
         )
         request = response.wsgi_request
-        assert not response.cookies["cart_id"].value
+        assert "cart_id" not in response.cookies
 
         cart = get_or_create_cart(test_user, request.COOKIES)
         assert cart == test_user_cart
@@ -47,6 +49,24 @@ class TestGetOrCreateCart:
         assert cart == Cart.objects.get(user=test_user)
 
 
+@pytest.mark.django_db
+class TestGetExistingCart:
+    def test_service_does_not_create_carts(self, test_user):
+        assert get_existing_cart(test_user, {}) is None
+        assert get_existing_cart(AnonymousUser(), {}) is None
+        assert get_existing_cart(AnonymousUser(), {"cart_id": "invalid"}) is None
+        assert not Cart.objects.exists()
+
+    def test_service_returns_existing_cart(self, test_user, test_user_cart):
+        guest_cart = Cart.objects.create()
+
+        assert get_existing_cart(test_user, {}) == test_user_cart
+        assert get_existing_cart(AnonymousUser(),
+                                 {"cart_id": str(guest_cart.cart_id)}) == guest_cart
+        assert get_existing_cart(AnonymousUser(),
+                                 {"cart_id": str(test_user_cart.cart_id)}) is None
+
+
 @pytest.mark.django_db
 class TestAddItemToCart:
     def test_add_new_item_to_cart(self, test_user_cart):
@@ -65,3 +85,34 @@ class TestAddItemToCart:
         cart_item = add_item_to_cart(test_user_cart, item.product)
         assert cart_item.cart == test_user_cart
         assert cart_item.quantity == 2
+
+    def test_add_several_items_to_cart(self, test_user_cart):
+        item = test_user_cart.items.first()
+
+        cart_item = add_item_to_cart(test_user_cart, item.product, quantity=5)
+        assert cart_item.pk == item.pk
+        assert cart_item.quantity == 6
+        
+        item.refresh_from_db()
+        assert item.quantity == 6
+        assert test_user_cart.items.filter(product=item.product).count() == 1
+
+
+@pytest.mark.django_db
+class TestSynchronizeCarts:
+    def test_synchronization_is_idempotent(self, test_user, test_user_cart):
+        product = test_user_cart.items.first().product
+        guest_cart = Cart.objects.create()
+        guest_cart.items.create(product=product, quantity=2)
+        cookies = {"cart_id": str(guest_cart.cart_id)}
+
+        synchronize_carts(test_user, cookies)
+        synchronize_carts(test_user, cookies)
+
+        assert test_user_cart.items.get(product=product).quantity == 3
+        assert not Cart.objects.filter(pk=guest_cart.pk).exists()
+
+    def test_synchronization_with_unknown_cart(self, test_user):
+        synchronize_carts(test_user, {"cart_id": "not-a-cart"})
+        synchronize_carts(test_user, {})
+        assert not Cart.objects.exists()
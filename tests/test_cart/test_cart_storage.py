@@ -0,0 +1,132 @@
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+from model_bakery import baker
+
+from cart.models import Cart, CartItem
+from cart.services import materialize_guest_cart, synchronize_carts
+from cart.storage import RedisCartStorage
+from goods.models import Product
+
+
+@pytest.fixture
+def redis_cart_backend(settings):
+    settings.CART_STORAGE_BACKEND = "redis"
+
+
+@pytest.fixture
+def test_products():
+    return baker.make(Product, price=100, _quantity=2)
+
+
+@pytest.fixture
+def guest_cart_id(api_client, redis_cart_backend, test_products):
+    for product in (test_products[0], test_products[0], test_products[1]):
+        response = api_client.post(
+            reverse("cart:cart_items"),
+            data={"product_id": product.pk},
+            format="json"
+        )
+        assert response.status_code == 201
+        if "cart_id" in response.cookies:
+            api_client.cookies["cart_id"] = response.cookies["cart_id"].value
+
+    cart_id = api_client.cookies["cart_id"].value
+    yield cart_id
+    RedisCartStorage().clear(cart_id)
+
+
+@pytest.mark.django_db
+class TestRedisCartStorage:
+    def test_guest_cart_is_not_stored_in_db(self, api_client, guest_cart_id,
+                                            test_products):
+        assert not Cart.objects.exists()
+        assert RedisCartStorage().get_items(guest_cart_id) == {
+            test_products[0].pk: 2,
+            test_products[1].pk: 1,
+        }
+
+        response = api_client.get(reverse("cart:my_cart"))
+        assert response.status_code == 200
+
+        response_data = response.json()
+        assert len(response_data["items"]) == 2
+        assert response_data["total_price"] == "300.00"
+
+    def test_reduce_item_quantity(self, api_client, guest_cart_id, test_products):
+        endpoint = reverse("cart:update_cart_item",
+                           kwargs={"pk": test_products[1].pk})
+        
+        response = api_client.patch(endpoint)
+        assert response.status_code == 200
+        assert len(response.json()["cart"]["items"]) == 1
+
+        response = api_client.patch(endpoint)
+        assert response.status_code == 404
+
+    def test_concurrent_reduce_item(self, guest_cart_id, test_products):
+        product_id = test_products[0].pk
+        storage = RedisCartStorage()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(
+                lambda _: RedisCartStorage().reduce_item(guest_cart_id, product_id),
+                range(4)
+            ))
+
+        # Количество было 2: одно уменьшение до 1, одно до 0 с удалением,
+        # остальные не находят товар
+        assert sorted(results, key=str) == [0, 1, None, None]
+        assert product_id not in storage.get_items(guest_cart_id)
+
+    def test_clear_cart(self, api_client, guest_cart_id,
+                        django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            response = api_client.delete(reverse("cart:my_cart"))
+        assert response.status_code == 200
+        assert RedisCartStorage().get_items(guest_cart_id) == {}
+
+    def test_materialize_guest_cart(self, guest_cart_id, test_products):
+        cart = materialize_guest_cart(guest_cart_id)
+        assert cart.user is None
+        assert {item.product_id: item.quantity for item in cart.items.all()} == {
+            test_products[0].pk: 2,
+            test_products[1].pk: 1,
+        }
+
+        # Цена при добавлении переносится вместе с количеством
+        assert set(cart.items.values_list("price", flat=True)) == {Decimal("100")}
+
+        # Повторный перенос не дублирует позиции
+        materialize_guest_cart(guest_cart_id)
+        assert cart.items.count() == 2
+
+    def test_synchronize_carts(self, guest_cart_id, test_user, test_products):
+        user_cart = Cart.objects.create(user=test_user)
+        CartItem.objects.create(cart=user_cart, product=test_products[0])
+
+        synchronize_carts(test_user, {"cart_id": guest_cart_id})
+
+        assert {item.product_id: item.quantity for item in user_cart.items.all()} == {
+            test_products[0].pk: 3,
+            test_products[1].pk: 1,
+        }
+        assert user_cart.items.get(product=test_products[1]).price == Decimal("100")
+        assert RedisCartStorage().get_items(guest_cart_id) == {}
+
+    def test_batch_operations(self, api_client, guest_cart_id, test_products):
+        response = api_client.post(
+            reverse("cart:cart_items_batch"),
+            data={"operations": [
+                {"product_id": test_products[0].pk, "quantity": 1, "action": "remove"},
+                {"product_id": test_products[1].pk, "quantity": 7, "action": "set"},
+            ]},
+            format="json"
+        )
+        assert response.status_code == 200
+        assert RedisCartStorage().get_entries(guest_cart_id) == (
+            {test_products[0].pk: 1, test_products[1].pk: 7},
+            {test_products[0].pk: Decimal("100"), test_products[1].pk: Decimal("100")},
+        )
+        assert not Cart.objects.exists()
@@ -3,9 +3,11 @@ from unittest.mock import patch
 import pytest
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from model_bakery import baker
 
 from cart import views
 from cart.models import Cart, CartItem
+from goods.models import Product
 from cart.serializers import (
     CartSerializer, CartAddItemSerializer, CartReduceItemQuantitySerializer
 )
@@ -55,6 +57,25 @@ class TestCartAPIView:
         serializer = CartSerializer(test_user_cart)
         assert serializer.data["items"] == response_data["items"]
 
+    def test_get_method_query_budget(self, test_user, authorized_api_client,
+                                     django_assert_max_num_queries):
+        cart = Cart.objects.create(user=test_user)
+        products = baker.make(Product, price=10, _quantity=30)
+        CartItem.objects.bulk_create(
+            [CartItem(cart=cart, product=product, quantity=2) for product in products]
+        )
+
+        # Пользователь, корзина и позиции вместе с товарами и категориями
+        with django_assert_max_num_queries(3):
+            response = authorized_api_client.get(
+                self.endpoint
+            )
+        assert response.status_code == 200
+
+        response_data = response.json()
+        assert len(response_data["items"]) == 30
+        assert response_data["total_price"] == "600.00"
+
     def test_get_method_with_unathorized_user(self, api_client):
         response = api_client.get(
             self.endpoint
@@ -63,7 +84,26 @@ class TestCartAPIView:
 
         response_data = response.json()
         assert response_data["detail"] == "Ваша корзина пуста"
-        assert Cart.objects.filter(pk=response.cookies["cart_id"].value).exists()
+        assert "cart_id" not in response.cookies
+        assert not Cart.objects.exists()
+
+    def test_get_method_with_unknown_cart_cookie(self, api_client):
+        api_client.cookies["cart_id"] = "not-a-cart"
+        response = api_client.get(
+            self.endpoint
+        )
+        assert response.status_code == 200
+        assert response.json()["detail"] == "Ваша корзина пуста"
+        assert not Cart.objects.exists()
+
+    def test_get_method_with_authorized_user_without_cart(self, authorized_api_client,
+                                                          test_user):
+        response = authorized_api_client.get(
+            self.endpoint
+        )
+        assert response.status_code == 200
+        assert response.json()["detail"] == "Ваша корзина пуста"
+        assert not Cart.objects.filter(user=test_user).exists()
     
     def test_delete_method_with_authorized_user(self, test_user_cart,
                                                 authorized_api_client, test_user):
@@ -79,9 +119,11 @@ class TestCartAPIView:
         assert len(test_user_cart.items.all()) == 0
         assert Cart.objects.filter(user=test_user).exists()
 
-    def test_delete_method_with_unauthorized_user(self, api_client):
-        response = api_client.get(
-            self.endpoint
+    def test_delete_method_with_unauthorized_user(self, api_client, test_user_cart):
+        response = api_client.post(
+            reverse("cart:cart_items"),
+            data={"product_id": test_user_cart.items.first().product.pk},
+            format="json"
         )
         cart_id = response.cookies["cart_id"].value
         api_client.cookies["cart_id"] = cart_id
@@ -110,8 +152,8 @@ class TestCartAPIView:
         
         new_cart = Cart.objects.create(user=new_user)
         
-        with patch("cart.views.get_or_create_cart") as mock_get_or_create_cart:
-            mock_get_or_create_cart.return_value = new_cart
+        with patch("cart.views.get_existing_cart") as mock_get_existing_cart:
+            mock_get_existing_cart.return_value = new_cart
 
             response = authorized_api_client.get(
                 self.endpoint
@@ -124,10 +166,8 @@ class TestCartAPIView:
         response = api_client.get(
             self.endpoint
         )
-        assert "cart_id" in response.cookies
+        assert "cart_id" not in response.cookies
 
-        api_client.cookies["cart_id"] = response.cookies["cart_id"].value
-        
         for _ in range(2):
             add_item_response = api_client.post(
                 reverse("cart:cart_items"),
@@ -150,7 +190,11 @@ class TestCartAPIView:
             format="json"
         )
 
-        assert not "cart_id" in auth_response.cookies
+        # Корзины сливаются при получении токена, cookie удаляется
+        assert not auth_response.cookies["cart_id"].value
+        assert test_user_cart.items.filter(product__pk=cart_item_1_id) \
+                                   .first().quantity == 3
+        assert not Cart.objects.filter(user__isnull=True).exists()
         
         auth_response_data = auth_response.json()
         api_client.credentials(
@@ -165,6 +209,63 @@ class TestCartAPIView:
         assert test_user_cart.items.filter(product__pk=cart_item_1_id) \
                                    .first().quantity == 3
 
+    def test_carts_synchronization_on_cart_access(self, api_client, test_user,
+                                                  test_user_cart, auth_tokens):
+        product = test_user_cart.items.first().product
+        guest_cart = Cart.objects.create()
+        CartItem.objects.create(cart=guest_cart, product=product, quantity=2)
+
+        api_client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {auth_tokens['access_token']}"
+        )
+        api_client.cookies["cart_id"] = str(guest_cart.cart_id)
+
+        response = api_client.get(self.endpoint)
+        assert response.status_code == 200
+        assert not response.cookies["cart_id"].value
+        assert test_user_cart.items.get(product=product).quantity == 3
+        assert not Cart.objects.filter(pk=guest_cart.pk).exists()
+
+    def test_authentication_does_not_touch_carts(self, api_client, test_user,
+                                                 auth_tokens):
+        guest_cart = Cart.objects.create()
+
+        api_client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {auth_tokens['access_token']}"
+        )
+        api_client.cookies["cart_id"] = str(guest_cart.cart_id)
+
+        response = api_client.get(reverse("users:me"))
+        assert response.status_code == 200
+        assert Cart.objects.filter(pk=guest_cart.pk).exists()
+
+    def test_guest_cart_survives_refresh_and_non_cart_requests(
+            self, api_client, test_user, test_user_cart, auth_tokens):
+        product = test_user_cart.items.first().product
+        guest_cart = Cart.objects.create()
+        CartItem.objects.create(cart=guest_cart, product=product, quantity=2)
+        api_client.cookies["cart_id"] = str(guest_cart.cart_id)
+
+        # Обновление токена корзины не сливает
+        response = api_client.post(
+            reverse("auth:refresh_jwt"),
+            data={"refresh": str(auth_tokens["refresh_token"].token)},
+            format="json"
+        )
+        assert response.status_code == 201
+        api_client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {response.data['access_token']}"
+        )
+
+        response = api_client.get(reverse("users:me"))
+        assert response.status_code == 200
+        assert "cart_id" not in response.cookies
+
+        response = api_client.get(self.endpoint)
+        assert response.status_code == 200
+        assert not response.cookies["cart_id"].value
+        assert test_user_cart.items.get(product=product).quantity == 3
+
 
 @pytest.mark.django_db
 class TestCartItemAPIView:
@@ -191,27 +292,37 @@ class TestCartItemAPIView:
         view.request = request
         assert view.get_serializer_class() is expected_serializer
 
-    @pytest.mark.parametrize("method",
-        [
-            "post", "patch"
-        ]
-    )
-    def test_get_serializer_context(self, factory, method):
-        view = views.CartItemAPIView.as_view()
-        request_method = getattr(factory, method)
+    def test_post_method_creates_guest_cart(self, api_client, test_user_cart):
+        product = test_user_cart.items.first().product
+        guest_carts = Cart.objects.filter(user__isnull=True)
 
-        endpoint = self.post_endpoint if method == "post" else self.get_patch_endpoint(pk=1)
-        request = request_method(endpoint, {} if method == "post" else None)
-        response = view(request, pk=1)
-        
-        view_instance = response.renderer_context["view"]
-        context = view_instance.get_serializer_context()
+        response = api_client.post(
+            self.post_endpoint,
+            data={"product_id": -1},
+            format="json"
+        )
+        assert response.status_code == 400
+        assert not guest_carts.exists()
+        assert "cart_id" not in response.cookies
+
+        response = api_client.post(
+            self.post_endpoint,
+            data={"product_id": product.pk},
+            format="json"
+        )
+        assert response.status_code == 201
         
-        if method == "post":
-            assert hasattr(context["request"], "cart")
-            assert isinstance(context["request"].cart, Cart)
-        else:
-            assert not hasattr(context["request"], "cart")
+        cart = guest_carts.get()
+        assert response.cookies["cart_id"].value == str(cart.cart_id)
+        assert cart.items.get().product == product
+
+        response = api_client.post(
+            self.post_endpoint,
+            data={"product_id": product.pk},
+            format="json"
+        )
+        assert "cart_id" not in response.cookies
+        assert cart.items.get().quantity == 2
 
     def test_partial_update(self, api_client, test_user, test_user_cart):
         credentials = {"username": test_user.username,
@@ -235,7 +346,7 @@ class TestCartItemAPIView:
             format="json"
         )
         assert auth_response.status_code == 201
-        assert not response.cookies["cart_id"].value
+        assert "cart_id" not in response.cookies
         
         endpoint = self.get_patch_endpoint(pk=cart_item_id_1.pk)
 
@@ -253,4 +364,62 @@ class TestCartItemAPIView:
 
         test_user_cart.refresh_from_db()
         assert test_user_cart.items.filter(pk=cart_item_id_1.pk).first().quantity == 1
-        assert not test_user_cart.items.filter(pk=cart_item_id_1.pk + 1).exists()
\ No newline at end of file
+        assert not test_user_cart.items.filter(pk=cart_item_id_1.pk + 1).exists()
+
+@pytest.mark.django_db
+class TestCartBatchAPIView:
+    @property
+    def endpoint(self):
+        return reverse("cart:cart_items_batch")
+
+    def test_batch_operations(self, test_user, authorized_api_client,
+                              django_assert_max_num_queries):
+        cart = Cart.objects.create(user=test_user)
+        products = baker.make(Product, price=10, _quantity=4)
+        CartItem.objects.bulk_create(
+            [CartItem(cart=cart, product=product) for product in products[:3]]
+        )
+        items = list(cart.items.order_by("id"))
+        new_product = products[3]
+        operations = [
+            {"product_id": items[0].product_id, "quantity": 10, "action": "set"},
+            {"product_id": items[1].product_id, "quantity": 2, "action": "add"},
+            {"product_id": items[2].product_id, "quantity": 5, "action": "remove"},
+            {"product_id": new_product.pk, "quantity": 3},
+        ]
+
+        # Число запросов не зависит от количества операций
+        with django_assert_max_num_queries(11):
+            response = authorized_api_client.post(self.endpoint,
+                                                  data={"operations": operations},
+                                                  format="json")
+        assert response.status_code == 200
+
+        quantities = dict(cart.items.values_list("product_id", "quantity"))
+        assert quantities[items[0].product_id] == 10
+        assert quantities[items[1].product_id] == 3
+        assert items[2].product_id not in quantities
+        assert quantities[new_product.pk] == 3
+        assert len(response.json()["items"]) == len(quantities)
+
+    def test_batch_with_unknown_product(self, test_user_cart, authorized_api_client):
+        response = authorized_api_client.post(
+            self.endpoint,
+            data={"operations": [{"product_id": -1, "quantity": 1}]},
+            format="json"
+        )
+        assert response.status_code == 400
+
+    def test_batch_creates_guest_cart(self, api_client, test_user_cart):
+        product = test_user_cart.items.first().product
+
+        response = api_client.post(
+            self.endpoint,
+            data={"operations": [{"product_id": product.pk, "quantity": 4}]},
+            format="json"
+        )
+        assert response.status_code == 200
+
+        guest_cart = Cart.objects.get(user__isnull=True)
+        assert response.cookies["cart_id"].value == str(guest_cart.cart_id)
+        assert guest_cart.items.get().quantity == 4
@@ -0,0 +1,25 @@
+import pytest
+from django.core.cache import caches
+from model_bakery import baker
+
+from goods.models import Category, Product
+
+
+@pytest.fixture(autouse=True)
+def clear_catalog_cache():
+    caches["default"].clear()
+
+
+@pytest.fixture
+def test_category():
+    return baker.make(Category, name="Test category", slug="test-category")
+
+
+@pytest.fixture
+def test_products(test_category):
+    return baker.make(
+        Product,
+        category=test_category,
+        name="Product",
+        _quantity=25
+    )
@@ -0,0 +1,62 @@
+import pytest
+from django.urls import reverse
+
+from goods.models import Product
+
+
+@pytest.mark.django_db
+class TestCatalogCache:
+    @property
+    def list_endpoint(self):
+        return reverse("goods:products-list")
+
+    def test_list_is_served_from_cache(self, api_client, test_products,
+                                       django_assert_num_queries):
+        response = api_client.get(self.list_endpoint, {"limit": 5})
+        assert response.status_code == 200
+
+        with django_assert_num_queries(0):
+            cached_response = api_client.get(self.list_endpoint, {"limit": 5})
+        assert cached_response.json() == response.json()
+
+    def test_query_params_are_normalized(self, api_client, test_products,
+                                         django_assert_num_queries):
+        api_client.get(self.list_endpoint, {"limit": 5, "offset": 5})
+
+        with django_assert_num_queries(0):
+            api_client.get(f"{self.list_endpoint}?offset=5&limit=5&search=")
+
+    def test_product_save_invalidates_cache(self, api_client, test_products,
+                                            django_capture_on_commit_callbacks):
+        product = test_products[0]
+        endpoint = reverse("goods:products-detail", kwargs={"pk": product.pk})
+        api_client.get(endpoint)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            product.name = "Renamed"
+            product.save()
+
+        response = api_client.get(endpoint)
+        assert response.json()["name"] == "Renamed"
+
+    def test_category_change_invalidates_products(self, api_client, test_products,
+                                                  test_category,
+                                                  django_capture_on_commit_callbacks):
+        api_client.get(self.list_endpoint)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            test_category.name = "Renamed category"
+            test_category.save()
+
+        response = api_client.get(self.list_endpoint)
+        assert response.json()["results"][0]["category_name"] == "Renamed category"
+
+    def test_product_delete_invalidates_cache(self, api_client, test_products,
+                                              django_capture_on_commit_callbacks):
+        api_client.get(self.list_endpoint)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Product.objects.get(pk=test_products[0].pk).delete()
+
+        response = api_client.get(self.list_endpoint)
+        assert response.json()["count"] == len(test_products) - 1
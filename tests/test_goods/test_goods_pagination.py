@@ -0,0 +1,57 @@
+import pytest
+from django.urls import reverse
+
+
+@pytest.mark.django_db
+class TestProductsCursorPagination:
+    @property
+    def endpoint(self):
+        return reverse("goods:products-list")
+
+    def collect_pages(self, api_client, url, link="next"):
+        names = []
+        while url:
+            response = api_client.get(url)
+            assert response.status_code == 200
+            response_data = response.json()
+            names.extend(product["name"] for product in response_data["results"])
+            url = response_data[link]
+        return names
+
+    def test_response_has_no_count(self, api_client, test_products):
+        response = api_client.get(self.endpoint, {"pagination": "cursor"})
+        assert response.status_code == 200
+
+        response_data = response.json()
+        assert "count" not in response_data
+        assert len(response_data["results"]) == 10
+        assert response_data["previous"] is None
+        assert response_data["next"] is not None
+
+    @pytest.mark.parametrize("ordering", ["name", "-created", "price"])
+    def test_pages_do_not_overlap(self, api_client, test_products, ordering):
+        response = api_client.get(self.endpoint, {"pagination": "cursor",
+                                                  "ordering": ordering,
+                                                  "limit": 7})
+        first_page = response.json()
+        
+        seen = [product["name"] for product in first_page["results"]]
+        seen += self.collect_pages(api_client, first_page["next"])
+        assert len(seen) == len(test_products)
+
+    def test_previous_link(self, api_client, test_products):
+        first_page = api_client.get(self.endpoint, {"pagination": "cursor"}).json()
+        second_page = api_client.get(first_page["next"]).json()
+        
+        previous_page = api_client.get(second_page["previous"]).json()
+        assert previous_page["results"] == first_page["results"]
+        assert previous_page["previous"] is None
+
+    def test_tampered_cursor(self, api_client, test_products):
+        response = api_client.get(self.endpoint, {"pagination": "cursor",
+                                                  "cursor": "garbage"})
+        assert response.status_code == 404
+
+    def test_default_pagination_is_limit_offset(self, api_client, test_products):
+        response = api_client.get(self.endpoint)
+        assert response.json()["count"] == len(test_products)
@@ -0,0 +1,37 @@
+import pytest
+from django.urls import reverse
+from django.contrib.postgres.search import SearchQuery
+from model_bakery import baker
+
+from goods.models import Product
+
+
+@pytest.mark.django_db
+class TestProductSearchFilter:
+    @property
+    def endpoint(self):
+        return reverse("goods:products-list")
+
+    def test_search_vector_is_maintained(self, test_category):
+        product = baker.make(Product, category=test_category,
+                             name="Красный чайник", description="")
+        Product.objects.filter(pk=product.pk).update(description="Kettle")
+        
+        russian_query = SearchQuery("чайник", config="russian")
+        english_query = SearchQuery("kettle", config="english")
+        assert Product.objects.filter(search_vector=russian_query).exists()
+        assert Product.objects.filter(search_vector=english_query).exists()
+
+    def test_search_ranks_name_above_description(self, api_client, test_category):
+        baker.make(Product, category=test_category,
+                   name="Кружка", description="Подходит к чайнику")
+        baker.make(Product, category=test_category,
+                   name="Чайник", description="Электрический")
+        baker.make(Product, category=test_category,
+                   name="Тарелка", description="Фарфор")
+
+        response = api_client.get(self.endpoint, {"search": "чайник"})
+        assert response.status_code == 200
+
+        names = [product["name"] for product in response.json()["results"]]
+        assert names == ["Чайник", "Кружка"]
@@ -0,0 +1,51 @@
+import pytest
+from django.urls import reverse
+from model_bakery import baker
+
+from cart.models import Cart, CartItem
+from cart.storage import RedisCartStorage
+from goods.models import Product
+
+
+@pytest.fixture
+def order_data():
+    return {"address": "ул. Тестовая, 1", "city": "Москва"}
+
+
+@pytest.fixture
+def guest_order_data(order_data):
+    return {**order_data, "first_name": "Гость", "last_name": "Гостев",
+            "email": "guest@example.com"}
+
+
+@pytest.fixture
+def make_user_cart(test_user):
+    def make(items_count):
+        cart, _ = Cart.objects.get_or_create(user=test_user)
+        products = baker.make(Product, price=100, _quantity=items_count)
+        CartItem.objects.bulk_create(
+            [CartItem(cart=cart, product=product, quantity=2) for product in products]
+        )
+        return cart
+    return make
+
+
+@pytest.fixture
+def make_guest_redis_cart(api_client, settings):
+    """Собирает гостевую корзину в Redis через API и возвращает ее cart_id"""
+    settings.CART_STORAGE_BACKEND = "redis"
+    cart_ids = []
+
+    def make(products):
+        for product in products:
+            response = api_client.post(reverse("cart:cart_items"),
+                                       data={"product_id": product.pk},
+                                       format="json")
+            if "cart_id" in response.cookies:
+                api_client.cookies["cart_id"] = response.cookies["cart_id"].value
+        cart_ids.append(api_client.cookies["cart_id"].value)
+        return cart_ids[-1]
+
+    yield make
+    for cart_id in cart_ids:
+        RedisCartStorage().clear(cart_id)
@@ -0,0 +1,64 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from orders.archive import archive_completed_orders
+from orders.models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
+from orders.partitions import month_start, next_month, partition_name
+
+
+@pytest.mark.django_db
+class TestArchiveCompletedOrders:
+    def test_moves_old_completed_orders(self, make_order):
+        old = make_order(status=Order.OrderStatus.COMPLETED, age_days=400)
+
+        archived = archive_completed_orders(older_than_days=180)
+
+        assert archived == 1
+        assert not Order.objects.filter(pk=old.pk).exists()
+        assert not OrderItem.objects.filter(order_id=old.pk).exists()
+
+        archived_order = ArchivedOrder.objects.get(pk=old.pk)
+        assert archived_order.order_uuid == old.order_uuid
+        assert archived_order.created == old.created
+        assert archived_order.total == old.total
+        items = ArchivedOrderItem.objects.filter(order_id=old.pk)
+        assert items.count() == 2
+        assert all(item.order_created == old.created for item in items)
+
+    def test_keeps_recent_and_open_orders(self, make_order):
+        recent = make_order(status=Order.OrderStatus.COMPLETED, age_days=10)
+        pending = make_order(status=Order.OrderStatus.PENDING, age_days=400)
+
+        assert archive_completed_orders(older_than_days=180) == 0
+        assert Order.objects.filter(pk__in=[recent.pk, pending.pk]).count() == 2
+        assert not ArchivedOrder.objects.exists()
+
+    def test_archives_in_batches(self, make_order):
+        for _ in range(5):
+            make_order(status=Order.OrderStatus.COMPLETED, age_days=400, items_count=1)
+
+        assert archive_completed_orders(older_than_days=180, batch_size=2) == 5
+        assert not Order.objects.exists()
+        assert ArchivedOrderItem.objects.count() == 5
+
+    def test_management_command(self, make_order):
+        make_order(status=Order.OrderStatus.COMPLETED, age_days=400)
+        out = StringIO()
+
+        call_command("archive_orders", "--older-than-days", "180", stdout=out)
+
+        assert "1" in out.getvalue()
+        assert ArchivedOrder.objects.count() == 1
+
+
+class TestPartitionNames:
+    def test_month_bounds(self):
+        month = month_start(timezone.now().replace(year=2025, month=12, day=31))
+
+        assert (month.year, month.month, month.day) == (2025, 12, 1)
+        assert (next_month(month).year, next_month(month).month) == (2026, 1)
+        assert partition_name("orders_archivedorder", month) == \
+            "orders_archivedorder_y2025m12"
@@ -0,0 +1,100 @@
+from unittest.mock import patch
+
+import pytest
+from django.db import DatabaseError, connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from model_bakery import baker
+
+from authentication.services.user_cache import UserCache
+from cart.models import Cart, CartItem
+from cart.storage import RedisCartStorage
+from goods.models import Product
+from orders.models import Order, OutboxEvent
+
+
+@pytest.mark.django_db
+class TestCheckout:
+    @property
+    def endpoint(self):
+        return reverse("orders:list_create_orders")
+
+    def test_checkout(self, authorized_api_client, test_user, make_user_cart,
+                      order_data, django_capture_on_commit_callbacks):
+        cart = make_user_cart(3)
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            response = authorized_api_client.post(self.endpoint, data=order_data,
+                                                  format="json")
+        assert response.status_code == 201
+
+        order = Order.objects.get(user=test_user)
+        assert order.email == test_user.email
+        assert order.items.count() == 3
+        assert not CartItem.objects.filter(cart=cart).exists()
+        assert OutboxEvent.objects.get().payload == {"order_id": order.id}
+        assert not callbacks
+
+    def test_checkout_query_count_does_not_depend_on_items(
+            self, authorized_api_client, test_user, make_user_cart, order_data):
+        # Пользователь кэшируется после первого запроса — прогреваем заранее
+        UserCache.get(test_user.pk)
+        query_counts = []
+        for items_count in (1, 20):
+            make_user_cart(items_count)
+            with CaptureQueriesContext(connection) as context:
+                response = authorized_api_client.post(self.endpoint, data=order_data,
+                                                      format="json")
+            assert response.status_code == 201
+            query_counts.append(len(context.captured_queries))
+
+        assert query_counts[0] == query_counts[1]
+
+    def test_checkout_with_empty_cart(self, authorized_api_client, test_user,
+                                      order_data, django_capture_on_commit_callbacks):
+        Cart.objects.create(user=test_user)
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            response = authorized_api_client.post(self.endpoint, data=order_data,
+                                                  format="json")
+        assert response.status_code == 400
+        assert not Order.objects.exists()
+        assert not OutboxEvent.objects.exists()
+        assert not callbacks
+
+    def test_guest_redis_cart_is_cleared_after_commit(
+            self, api_client, make_guest_redis_cart, guest_order_data,
+            django_capture_on_commit_callbacks):
+        cart_id = make_guest_redis_cart(baker.make(Product, price=100, _quantity=2))
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            response = api_client.post(self.endpoint, data=guest_order_data,
+                                       format="json")
+            assert response.status_code == 201
+            assert RedisCartStorage().get_items(cart_id)
+
+        for callback in callbacks:
+            callback()
+        assert RedisCartStorage().get_items(cart_id) == {}
+
+    def test_failed_checkout_keeps_guest_redis_cart(
+            self, api_client, make_guest_redis_cart, guest_order_data,
+            django_capture_on_commit_callbacks):
+        products = baker.make(Product, price=100, _quantity=2)
+        cart_id = make_guest_redis_cart(products)
+
+        with django_capture_on_commit_callbacks(execute=True), \
+                patch.object(OutboxEvent.objects, "create",
+                             side_effect=DatabaseError("outbox")), \
+                pytest.raises(DatabaseError):
+            api_client.post(self.endpoint, data=guest_order_data, format="json")
+
+        assert not Order.objects.exists()
+        assert RedisCartStorage().get_items(cart_id) == {
+            product.pk: 1 for product in products
+        }
+
+    def test_checkout_without_cart(self, authorized_api_client, order_data):
+        response = authorized_api_client.post(self.endpoint, data=order_data,
+                                              format="json")
+        assert response.status_code == 404
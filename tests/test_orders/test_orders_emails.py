@@ -0,0 +1,118 @@
+import smtplib
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from celery.exceptions import Retry
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.utils import timezone
+from model_bakery import baker
+
+from orders import emails
+from orders.models import Order
+from orders.tasks import send_order_confirmations, send_order_email
+
+
+send_messages = EmailBackend.send_messages
+
+
+def fail_for_bad_address(backend, messages):
+    if any("bad@example.com" in message.to for message in messages):
+        raise smtplib.SMTPRecipientsRefused({})
+    return send_messages(backend, messages)
+
+
+@pytest.mark.django_db
+class TestOrderConfirmations:
+    def test_batch_uses_one_connection(self):
+        orders = baker.make(Order, email="buyer@example.com", _quantity=3)
+
+        with patch.object(emails, "get_connection",
+                          wraps=emails.get_connection) as mock_connection:
+            sent = send_order_confirmations()
+
+        assert sent == 3
+        assert len(mail.outbox) == 3
+        assert mock_connection.call_count == 1
+        assert not Order.objects.filter(id__in=[order.id for order in orders],
+                                        confirmation_sent__isnull=True).exists()
+
+    def test_sent_orders_are_not_resent(self):
+        baker.make(Order, email="buyer@example.com")
+        send_order_confirmations()
+
+        assert send_order_confirmations() == 0
+        assert len(mail.outbox) == 1
+
+    def test_failed_message_is_retried_alone(self):
+        good = baker.make(Order, email="buyer@example.com")
+        bad = baker.make(Order, email="bad@example.com")
+
+        with patch.object(EmailBackend, "send_messages", autospec=True,
+                          side_effect=fail_for_bad_address):
+            with pytest.raises(Retry):
+                send_order_confirmations()
+
+        good.refresh_from_db()
+        bad.refresh_from_db()
+        assert good.confirmation_sent is not None
+        assert bad.confirmation_sent is None
+        assert bad.confirmation_attempts == 1
+
+        assert send_order_confirmations() == 1
+        assert [message.to for message in mail.outbox] == \
+            [["buyer@example.com"], ["bad@example.com"]]
+
+    def test_orders_are_claimed_before_sending(self):
+        order = baker.make(Order, email="buyer@example.com")
+        claimed = []
+
+        def deliver(messages):
+            claimed.append(Order.objects.get(pk=order.pk).confirmation_claimed)
+            return []
+
+        with patch("orders.tasks.deliver_messages", side_effect=deliver):
+            send_order_confirmations()
+
+        order.refresh_from_db()
+        assert claimed[0] is not None
+        assert order.confirmation_claimed is None
+        assert order.confirmation_sent is not None
+        assert order.confirmation_attempts == 1
+
+    def test_claimed_orders_are_skipped_until_claim_expires(self, settings):
+        settings.ORDER_EMAIL_CLAIM_TIMEOUT = 60
+        fresh = baker.make(Order, email="buyer@example.com",
+                           confirmation_claimed=timezone.now())
+        stale = baker.make(Order, email="buyer@example.com",
+                           confirmation_claimed=timezone.now() - timedelta(minutes=5))
+
+        assert send_order_confirmations() == 1
+
+        fresh.refresh_from_db()
+        stale.refresh_from_db()
+        assert fresh.confirmation_sent is None
+        assert stale.confirmation_sent is not None
+
+    def test_connection_error_releases_claims(self):
+        order = baker.make(Order, email="buyer@example.com")
+
+        with patch.object(emails, "get_connection",
+                          side_effect=smtplib.SMTPConnectError(421, "busy")):
+            # При прямом вызове retry пробрасывает исходную ошибку
+            with pytest.raises(smtplib.SMTPConnectError):
+                send_order_confirmations()
+
+        order.refresh_from_db()
+        assert order.confirmation_claimed is None
+        assert order.confirmation_sent is None
+
+    def test_legacy_send_order_email_task(self):
+        order = baker.make(Order, email="buyer@example.com")
+
+        send_order_email(order.id, order.email)
+
+        order.refresh_from_db()
+        assert order.confirmation_sent is not None
+        assert len(mail.outbox) == 1
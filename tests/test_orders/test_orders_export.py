@@ -0,0 +1,123 @@
+import csv
+import io
+import json
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.http import StreamingHttpResponse
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from orders.archive import archive_completed_orders
+from orders.models import Order
+
+
+def read_stream(response):
+    return b"".join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db
+class TestOrderExport:
+    @property
+    def endpoint(self):
+        return reverse("orders:export_orders")
+
+    def test_csv_export(self, staff_client, make_order):
+        order = make_order(items_count=2)
+        empty = make_order(items_count=0)
+
+        response = staff_client.get(self.endpoint)
+
+        assert response.status_code == 200
+        assert isinstance(response, StreamingHttpResponse)
+        assert response["Content-Type"].startswith("text/csv")
+        rows = list(csv.DictReader(io.StringIO(read_stream(response))))
+        assert [int(row["order_id"]) for row in rows] == [order.id, order.id, empty.id]
+        assert rows[0]["item_cost"] == "10.00"
+        assert rows[2]["item_product_id"] == ""
+
+    def test_ndjson_export(self, staff_client, make_order):
+        order = make_order(items_count=3)
+
+        response = staff_client.get(self.endpoint, {"output": "ndjson"})
+
+        [line] = read_stream(response).splitlines()
+        data = json.loads(line)
+        assert data["id"] == order.id
+        assert len(data["items"]) == 3
+
+    def test_filters(self, staff_client, make_order):
+        make_order(age_days=40)
+        paid = make_order(status=Order.OrderStatus.PAID)
+        make_order(status=Order.OrderStatus.PENDING)
+        today = timezone.localdate()
+
+        response = staff_client.get(self.endpoint, {
+            "output": "ndjson",
+            "date_from": today - timedelta(days=1),
+            "date_to": today,
+            "status": Order.OrderStatus.PAID,
+        })
+
+        lines = read_stream(response).splitlines()
+        assert [json.loads(line)["id"] for line in lines] == [paid.id]
+
+    def test_queries_grow_with_chunks_not_orders(self, staff_client, make_order,
+                                                 settings):
+        settings.ORDER_EXPORT_CHUNK_SIZE = 5
+        for _ in range(10):
+            make_order(items_count=3)
+
+        with CaptureQueriesContext(connection) as context:
+            read_stream(staff_client.get(self.endpoint))
+
+        # На каждую пачку: заказы и их позиции с товарами
+        assert len(context.captured_queries) <= 2 * 3 + 2
+
+    def test_export_includes_archived_orders(self, staff_client, make_order, settings):
+        settings.ORDER_ARCHIVE_AFTER_DAYS = 180
+        archived = make_order(items_count=2, status=Order.OrderStatus.COMPLETED,
+                              age_days=400)
+        pending = make_order(items_count=1, age_days=300)
+        recent = make_order(items_count=1, status=Order.OrderStatus.COMPLETED)
+        assert archive_completed_orders() == 1
+        today = timezone.localdate()
+
+        response = staff_client.get(self.endpoint, {
+            "date_from": today - timedelta(days=500),
+            "date_to": today,
+        })
+
+        rows = list(csv.DictReader(io.StringIO(read_stream(response))))
+        assert [int(row["order_id"]) for row in rows] == [
+            archived.id, archived.id, pending.id, recent.id
+        ]
+        assert rows[0]["item_cost"] == "10.00"
+
+        response = staff_client.get(self.endpoint, {
+            "output": "ndjson", "status": Order.OrderStatus.COMPLETED,
+        })
+        lines = [json.loads(line) for line in read_stream(response).splitlines()]
+        assert [line["id"] for line in lines] == [archived.id, recent.id]
+        assert len(lines[0]["items"]) == 2
+
+    def test_export_includes_recently_archived_orders(self, staff_client,
+                                                      make_order):
+        # archive_orders --older-than-days может архивировать и свежие заказы
+        archived = make_order(items_count=1, status=Order.OrderStatus.COMPLETED,
+                              age_days=10)
+        assert archive_completed_orders(older_than_days=5) == 1
+        today = timezone.localdate()
+
+        response = staff_client.get(self.endpoint, {
+            "date_from": today - timedelta(days=30), "date_to": today,
+        })
+
+        rows = list(csv.DictReader(io.StringIO(read_stream(response))))
+        assert [int(row["order_id"]) for row in rows] == [archived.id]
+
+    def test_regular_user_is_forbidden(self, authorized_api_client):
+        response = authorized_api_client.get(self.endpoint)
+        assert response.status_code == 403
@@ -0,0 +1,146 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from model_bakery import baker
+
+from authentication.services.user_cache import UserCache
+from orders.archive import archive_completed_orders
+from orders.models import Order
+
+
+@pytest.mark.django_db
+class TestOrderHistory:
+    @property
+    def endpoint(self):
+        return reverse("orders:list_create_orders")
+
+    def test_history_is_paginated(self, authorized_api_client, test_user,
+                                  make_order):
+        orders = [make_order(user=test_user) for _ in range(5)]
+        expected = sorted(orders, key=lambda order: (order.created, order.id),
+                          reverse=True)
+
+        seen = []
+        url = f"{self.endpoint}?limit=2"
+        while url:
+            response = authorized_api_client.get(url)
+            assert response.status_code == 200
+            assert len(response.data["results"]) <= 2
+            seen.extend(order["id"] for order in response.data["results"])
+            url = response.data["next"]
+
+        assert seen == [order.id for order in expected]
+
+    def test_history_query_count_does_not_depend_on_orders(
+            self, authorized_api_client, test_user, make_order):
+        # Пользователь кэшируется после первого запроса — прогреваем заранее
+        UserCache.get(test_user.pk)
+        make_order(items_count=1, user=test_user)
+        with CaptureQueriesContext(connection) as small:
+            authorized_api_client.get(self.endpoint)
+
+        for _ in range(8):
+            make_order(items_count=4, user=test_user)
+        with CaptureQueriesContext(connection) as large:
+            response = authorized_api_client.get(self.endpoint)
+
+        assert len(response.data["results"]) == 9
+        assert len(small.captured_queries) == len(large.captured_queries)
+
+    def test_summary_view_omits_items(self, authorized_api_client, test_user,
+                                      make_order):
+        make_order(user=test_user)
+        make_order(user=test_user)
+
+        response = authorized_api_client.get(f"{self.endpoint}?view=summary")
+
+        assert response.status_code == 200
+        order = response.data["results"][0]
+        assert "items" not in order
+        assert "item_count" in order
+
+    def test_history_with_invalid_cursor(self, authorized_api_client):
+        response = authorized_api_client.get(f"{self.endpoint}?cursor=invalid")
+        assert response.status_code == 404
+
+    def test_history_only_shows_own_orders(self, authorized_api_client, test_user,
+                                           make_order):
+        make_order(user=test_user)
+        baker.make(Order)
+
+        response = authorized_api_client.get(self.endpoint)
+
+        assert len(response.data["results"]) == 1
+
+
+@pytest.fixture
+def orders_with_archive(test_user, make_order):
+    """Заказы разного возраста; выполненные старше 180 дней уходят в архив"""
+    ages = [(400, Order.OrderStatus.COMPLETED), (300, Order.OrderStatus.PENDING),
+            (200, Order.OrderStatus.COMPLETED), (10, Order.OrderStatus.COMPLETED)]
+    orders = [make_order(status=status, age_days=age_days, user=test_user)
+              for age_days, status in ages]
+    assert archive_completed_orders(older_than_days=180) == 2
+    # От новых к старым
+    return [order.id for order in reversed(orders)]
+
+
+@pytest.mark.django_db
+class TestArchivedOrdersInHistory:
+    def test_history_merges_archived_orders(self, authorized_api_client,
+                                            orders_with_archive):
+        seen = []
+        url = f"{reverse('orders:list_create_orders')}?limit=1"
+        while url:
+            response = authorized_api_client.get(url)
+            assert response.status_code == 200
+            for order in response.data["results"]:
+                seen.append(order["id"])
+                assert len(order["items"]) == 2
+                assert order["total_cost"] == Decimal("20")
+            url = response.data["next"]
+
+        assert seen == orders_with_archive
+
+    def test_history_pages_back_through_archive(self, authorized_api_client,
+                                                orders_with_archive):
+        url = f"{reverse('orders:list_create_orders')}?limit=3"
+        response = authorized_api_client.get(url)
+        response = authorized_api_client.get(response.data["next"])
+        assert [order["id"] for order in response.data["results"]] == orders_with_archive[3:]
+
+        response = authorized_api_client.get(response.data["previous"])
+        assert [order["id"] for order in response.data["results"]] == orders_with_archive[:3]
+
+    def test_summary_view_includes_archived_orders(self, authorized_api_client,
+                                                   orders_with_archive):
+        response = authorized_api_client.get(
+            f"{reverse('orders:list_create_orders')}?view=summary"
+        )
+
+        assert [order["id"] for order in response.data["results"]] == orders_with_archive
+
+    def test_retrieve_archived_order(self, authorized_api_client, orders_with_archive):
+        archived_id = orders_with_archive[-1]
+
+        response = authorized_api_client.get(
+            reverse("orders:retrieve_order", kwargs={"pk": archived_id})
+        )
+
+        assert response.status_code == 200
+        assert response.data["id"] == archived_id
+        assert response.data["status"] == Order.OrderStatus.COMPLETED
+        assert len(response.data["items"]) == 2
+
+    def test_retrieve_foreign_archived_order(self, api_client, orders_with_archive):
+        api_client.force_authenticate(baker.make(get_user_model()))
+
+        response = api_client.get(
+            reverse("orders:retrieve_order", kwargs={"pk": orders_with_archive[-1]})
+        )
+
+        assert response.status_code == 404
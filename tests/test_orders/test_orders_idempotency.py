@@ -0,0 +1,74 @@
+import uuid
+
+import pytest
+from django.urls import reverse
+
+from orders.models import Order, OutboxEvent
+
+
+@pytest.fixture
+def idempotency_key():
+    return str(uuid.uuid4())
+
+
+@pytest.mark.django_db
+class TestOrderIdempotency:
+    @property
+    def endpoint(self):
+        return reverse("orders:list_create_orders")
+
+    def post(self, client, data, key):
+        return client.post(self.endpoint, data=data, format="json",
+                           HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_returns_stored_response(self, authorized_api_client, test_user,
+                                           make_user_cart, order_data,
+                                           idempotency_key):
+        make_user_cart(2)
+
+        first = self.post(authorized_api_client, order_data, idempotency_key)
+        make_user_cart(2)
+        retry = self.post(authorized_api_client, order_data, idempotency_key)
+
+        assert first.status_code == retry.status_code == 201
+        assert retry.data == first.data
+        assert retry["Idempotent-Replayed"] == "true"
+        assert Order.objects.filter(user=test_user).count() == 1
+        assert OutboxEvent.objects.count() == 1
+
+    def test_different_keys_create_different_orders(self, authorized_api_client,
+                                                    test_user, make_user_cart,
+                                                    order_data):
+        for _ in range(2):
+            make_user_cart(1)
+            response = self.post(authorized_api_client, order_data,
+                                 str(uuid.uuid4()))
+            assert response.status_code == 201
+
+        assert Order.objects.filter(user=test_user).count() == 2
+
+    def test_reused_key_with_other_data(self, authorized_api_client, make_user_cart,
+                                        order_data, idempotency_key):
+        make_user_cart(1)
+        self.post(authorized_api_client, order_data, idempotency_key)
+
+        response = self.post(authorized_api_client,
+                             {**order_data, "city": "Казань"}, idempotency_key)
+
+        assert response.status_code == 422
+
+    def test_failed_request_is_not_stored(self, authorized_api_client, test_user,
+                                          make_user_cart, order_data,
+                                          idempotency_key):
+        response = self.post(authorized_api_client, order_data, idempotency_key)
+        assert response.status_code == 404
+
+        make_user_cart(1)
+        response = self.post(authorized_api_client, order_data, idempotency_key)
+
+        assert response.status_code == 201
+        assert Order.objects.filter(user=test_user).count() == 1
+
+    def test_too_long_key(self, authorized_api_client, order_data):
+        response = self.post(authorized_api_client, order_data, "x" * 256)
+        assert response.status_code == 400
@@ -0,0 +1,123 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from kombu.exceptions import OperationalError
+
+from orders.models import OutboxEvent
+from orders.outbox import prune_published_events, publish_pending_events, relay_events
+from orders.tasks import prune_outbox_events
+
+
+EventType = OutboxEvent.EventType
+
+
+def make_events(event_type, payloads):
+    return OutboxEvent.objects.bulk_create([
+        OutboxEvent(event_type=event_type, payload=payload) for payload in payloads
+    ])
+
+
+@pytest.mark.django_db
+class TestOutboxRelay:
+    def test_events_are_published_in_one_task_per_type(self):
+        make_events(EventType.ORDER_CREATED, [{"order_id": 1}, {"order_id": 2}])
+        make_events(EventType.ORDER_STATUS_CHANGED,
+                    [{"order_ids": [3, 4], "status": "paid"},
+                     {"order_ids": [4, 5], "status": "packing"}])
+
+        with patch("orders.outbox.send_order_confirmations.delay") as mock_created, \
+                patch("orders.outbox.send_order_status_emails.delay") as mock_status:
+            assert publish_pending_events() == 4
+
+        mock_created.assert_called_once_with()
+        mock_status.assert_called_once_with([3, 4, 5])
+        assert not OutboxEvent.objects.filter(published__isnull=True).exists()
+
+    def test_broker_failure_keeps_events_pending(self):
+        make_events(EventType.ORDER_CREATED, [{"order_id": 1}])
+
+        with patch("orders.outbox.send_order_confirmations.delay",
+                   side_effect=OperationalError("broker is down")):
+            assert publish_pending_events() == 0
+
+        event = OutboxEvent.objects.get()
+        assert event.published is None
+        assert event.attempts == 1
+
+        with patch("orders.outbox.send_order_confirmations.delay"):
+            assert publish_pending_events() == 1
+
+    def test_retry_skips_publishers_that_succeeded(self):
+        [event] = make_events(EventType.ORDER_STATUS_CHANGED,
+                              [{"order_ids": [1], "status": "paid"}])
+
+        with patch("orders.outbox.send_order_status_emails.delay") as mock_status, \
+                patch("analytics.subscribers.apply_sales_events.delay",
+                      side_effect=OperationalError("broker is down")):
+            assert publish_pending_events() == 0
+
+        event.refresh_from_db()
+        assert event.published is None
+        assert event.attempts == 1
+        assert event.delivered_to == ["orders.outbox._publish_status_changed"]
+
+        with patch("orders.outbox.send_order_status_emails.delay") as mock_retry_status, \
+                patch("analytics.subscribers.apply_sales_events.delay") as mock_apply:
+            assert publish_pending_events() == 1
+
+        mock_status.assert_called_once_with([1])
+        mock_retry_status.assert_not_called()
+        mock_apply.assert_called_once_with([event.id])
+        assert OutboxEvent.objects.get().published is not None
+
+    def test_relay_drains_outbox_in_batches(self):
+        make_events(EventType.ORDER_CREATED, [{"order_id": i} for i in range(5)])
+
+        with patch("orders.outbox.send_order_confirmations.delay") as mock_created:
+            assert relay_events(batch_size=2) == 5
+
+        assert mock_created.call_count == 3
+
+    def test_relay_command_once(self):
+        make_events(EventType.ORDER_CREATED, [{"order_id": 1}])
+        out = StringIO()
+
+        with patch("orders.outbox.send_order_confirmations.delay"):
+            call_command("relay_outbox", "--once", stdout=out)
+
+        assert "1" in out.getvalue()
+        assert OutboxEvent.objects.get().published is not None
+
+
+@pytest.mark.django_db
+class TestOutboxPrune:
+    def test_prunes_only_old_published_events(self):
+        old, recent, pending = make_events(EventType.ORDER_CREATED,
+                                           [{"order_id": i} for i in range(3)])
+        OutboxEvent.objects.filter(pk=old.pk).update(
+            published=timezone.now() - timedelta(days=10)
+        )
+        OutboxEvent.objects.filter(pk=recent.pk).update(published=timezone.now())
+
+        assert prune_published_events(older_than_days=7) == 1
+        assert set(OutboxEvent.objects.values_list("id", flat=True)) == {
+            recent.pk, pending.pk
+        }
+
+    def test_prunes_in_batches(self, settings):
+        settings.OUTBOX_RETENTION_DAYS = 7
+        make_events(EventType.ORDER_CREATED, [{"order_id": i} for i in range(5)])
+        OutboxEvent.objects.update(published=timezone.now() - timedelta(days=8))
+
+        assert prune_published_events(batch_size=2) == 5
+        assert not OutboxEvent.objects.exists()
+
+    def test_prune_task(self):
+        make_events(EventType.ORDER_CREATED, [{"order_id": 1}])
+        OutboxEvent.objects.update(published=timezone.now() - timedelta(days=30))
+
+        assert prune_outbox_events() == 1
@@ -0,0 +1,115 @@
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+from model_bakery import baker
+
+from cart.models import CartItem
+from cart.storage import RedisCartStorage
+from goods.models import Product
+from orders.models import Order
+
+
+@pytest.mark.django_db
+class TestCheckoutPriceCheck:
+    @property
+    def endpoint(self):
+        return reverse("orders:list_create_orders")
+
+    def checkout(self, client, order_data, **extra):
+        return client.post(self.endpoint, data={**order_data, **extra},
+                           format="json")
+
+    def test_repriced_items_are_reported(self, authorized_api_client,
+                                         make_user_cart, order_data):
+        cart = make_user_cart(2)
+        CartItem.objects.filter(cart=cart).update(price=80)
+        changed = CartItem.objects.filter(cart=cart).first().product
+
+        response = self.checkout(authorized_api_client, order_data)
+
+        assert response.status_code == 409
+        assert response.data["removed"] == []
+        assert {line["product_id"] for line in response.data["repriced"]} == \
+            {item.product_id for item in CartItem.objects.filter(cart=cart)}
+        line = next(line for line in response.data["repriced"]
+                    if line["product_id"] == changed.id)
+        assert (line["old_price"], line["new_price"]) == ("80.00", "100.00")
+        assert not Order.objects.exists()
+
+        # Корзина получила новые цены — повтор проходит
+        assert set(CartItem.objects.filter(cart=cart)
+                   .values_list("price", flat=True)) == {Decimal("100")}
+        assert self.checkout(authorized_api_client, order_data).status_code == 201
+
+    def test_unavailable_items_are_removed(self, authorized_api_client,
+                                           make_user_cart, order_data):
+        cart = make_user_cart(2)
+        gone = CartItem.objects.filter(cart=cart).first().product
+        Product.objects.filter(pk=gone.pk).update(available=False)
+
+        response = self.checkout(authorized_api_client, order_data,
+                                 accept_price_changes=True)
+
+        assert response.status_code == 409
+        assert response.data["removed"] == [{"product_id": gone.id,
+                                             "name": gone.name}]
+        assert not CartItem.objects.filter(cart=cart, product=gone).exists()
+        assert CartItem.objects.filter(cart=cart).count() == 1
+
+    def test_guest_redis_cart_retry_succeeds(self, api_client, make_guest_redis_cart,
+                                             guest_order_data):
+        kept, gone = baker.make(Product, price=100, _quantity=2)
+        cart_id = make_guest_redis_cart([kept, gone])
+        Product.objects.filter(pk=gone.pk).update(available=False)
+
+        response = self.checkout(api_client, guest_order_data)
+        assert response.status_code == 409
+        assert response.data["removed"] == [{"product_id": gone.id,
+                                             "name": gone.name}]
+        assert RedisCartStorage().get_items(cart_id) == {kept.pk: 1}
+
+        response = self.checkout(api_client, guest_order_data)
+        assert response.status_code == 201
+        order = Order.objects.get()
+        assert list(order.items.values_list("product_id", flat=True)) == [kept.pk]
+
+    def test_guest_redis_cart_repriced_items_are_reported(
+            self, api_client, make_guest_redis_cart, guest_order_data):
+        product = baker.make(Product, price=80)
+        cart_id = make_guest_redis_cart([product])
+        Product.objects.filter(pk=product.pk).update(price=100)
+
+        response = self.checkout(api_client, guest_order_data)
+
+        assert response.status_code == 409
+        assert response.data["repriced"] == [{
+            "product_id": product.id, "name": product.name,
+            "old_price": "80.00", "new_price": "100.00",
+        }]
+        assert not Order.objects.exists()
+
+        # Новая цена записана в Redis — повтор проходит
+        assert RedisCartStorage().get_entries(cart_id)[1] == {
+            product.pk: Decimal("100")
+        }
+        assert self.checkout(api_client, guest_order_data).status_code == 201
+
+    def test_accept_price_changes(self, authorized_api_client, test_user,
+                                  make_user_cart, order_data):
+        cart = make_user_cart(1)
+        CartItem.objects.filter(cart=cart).update(price=80)
+
+        response = self.checkout(authorized_api_client, order_data,
+                                 accept_price_changes=True)
+
+        assert response.status_code == 201
+        assert Order.objects.get(user=test_user).total == Decimal("200")
+
+    def test_add_to_cart_stores_price(self, authorized_api_client, make_user_cart):
+        product = make_user_cart(1).items.get().product
+
+        authorized_api_client.post(reverse("cart:cart_items"),
+                                   data={"product_id": product.id}, format="json")
+
+        assert CartItem.objects.get(product=product).price == Decimal("100")
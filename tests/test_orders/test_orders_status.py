@@ -0,0 +1,105 @@
+import pytest
+from django.contrib import admin
+from django.core import mail
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from model_bakery import baker
+from rest_framework.exceptions import ValidationError
+
+from orders.models import Order, OutboxEvent
+from orders.services import transition_orders
+from orders.tasks import send_order_status_emails
+
+
+Status = Order.OrderStatus
+
+
+@pytest.mark.django_db
+class TestTransitionOrders:
+    def test_transitions_only_orders_in_expected_status(self):
+        pending = baker.make(Order, status=Status.PENDING, _quantity=3)
+        packing = baker.make(Order, status=Status.PACKING)
+
+        updated, skipped = transition_orders(
+            [order.id for order in pending] + [packing.id, 10**9],
+            Status.PAID
+        )
+
+        assert updated == sorted(order.id for order in pending)
+        assert skipped == sorted([packing.id, 10**9])
+        assert Order.objects.filter(status=Status.PAID, paid=True).count() == 3
+        event = OutboxEvent.objects.get()
+        assert event.event_type == OutboxEvent.EventType.ORDER_STATUS_CHANGED
+        assert event.payload["order_ids"] == updated
+
+    def test_single_update_per_transition(self):
+        orders = baker.make(Order, status=Status.PAID, _quantity=50)
+
+        with CaptureQueriesContext(connection) as context:
+            transition_orders([order.id for order in orders], Status.PACKING)
+
+        updates = [query for query in context.captured_queries
+                   if query["sql"].startswith("UPDATE")]
+        assert len(updates) == 1
+
+    def test_cannot_transition_to_initial_status(self):
+        order = baker.make(Order, status=Status.PAID)
+
+        with pytest.raises(ValidationError):
+            transition_orders([order.id], Status.PENDING)
+
+    def test_status_emails_are_sent_in_one_batch(self):
+        orders = baker.make(Order, status=Status.DELIVERING,
+                            email="buyer@example.com", _quantity=3)
+
+        sent = send_order_status_emails([order.id for order in orders])
+
+        assert sent == 3
+        assert len(mail.outbox) == 3
+
+
+@pytest.mark.django_db
+class TestOrderStatusAPI:
+    @property
+    def endpoint(self):
+        return reverse("orders:bulk_order_status")
+
+    def test_staff_transitions_orders(self, staff_client):
+        paid = baker.make(Order, status=Status.PAID)
+        pending = baker.make(Order, status=Status.PENDING)
+
+        response = staff_client.post(
+            self.endpoint,
+            data={"ids": [paid.id, pending.id], "status": Status.PACKING},
+            format="json"
+        )
+
+        assert response.status_code == 200
+        assert response.data["updated"] == [paid.id]
+        assert response.data["skipped"] == [pending.id]
+
+    def test_invalid_status(self, staff_client):
+        order = baker.make(Order, status=Status.PAID)
+
+        response = staff_client.post(
+            self.endpoint,
+            data={"ids": [order.id], "status": Status.PENDING},
+            format="json"
+        )
+
+        assert response.status_code == 400
+
+    def test_regular_user_is_forbidden(self, authorized_api_client):
+        response = authorized_api_client.post(
+            self.endpoint, data={"ids": [1], "status": Status.PAID}, format="json"
+        )
+        assert response.status_code == 403
+
+
+class TestOrderAdmin:
+    def test_status_is_changed_only_by_actions(self, rf):
+        order_admin = admin.site._registry[Order]
+
+        assert "status" in order_admin.get_readonly_fields(rf.get("/"))
+        assert len(order_admin.actions) == len(Order.STATUS_FLOW)
@@ -0,0 +1,36 @@
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+
+from orders.models import Order, OrderItem
+
+
+@pytest.mark.django_db
+class TestOrderTotals:
+    def test_totals_are_stored_at_checkout(self, authorized_api_client, test_user,
+                                           make_user_cart, order_data):
+        make_user_cart(3)
+
+        response = authorized_api_client.post(reverse("orders:list_create_orders"),
+                                              data=order_data, format="json")
+        assert response.status_code == 201
+
+        order = Order.objects.get(user=test_user)
+        assert order.subtotal == Decimal("600")
+        assert order.total == Decimal("600")
+        assert order.item_count == 6
+
+    def test_update_totals(self, authorized_api_client, test_user,
+                           make_user_cart, order_data):
+        make_user_cart(2)
+        authorized_api_client.post(reverse("orders:list_create_orders"),
+                                   data=order_data, format="json")
+        order = Order.objects.get(user=test_user)
+
+        OrderItem.objects.filter(order=order).update(quantity=5)
+        order.update_totals()
+        order.refresh_from_db()
+
+        assert order.subtotal == Decimal("1000")
+        assert order.item_count == 10